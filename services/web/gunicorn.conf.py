@@ -0,0 +1,24 @@
+"""
+Gunicorn settings, read from the working directory when the server starts
+
+GUNICORN_WORKER_CLASS=gevent serves each request in a greenlet, so a worker keeps hundreds of requests in flight
+while they wait on Postgres, the Celery broker or OAuth providers. The default sync workers serve one request at a
+time and remain available for comparison. Every in-flight request of a gevent worker may need a connection, size the
+pool with DATABASE_POOL_SIZE and DATABASE_MAX_OVERFLOW or use PgBouncer (DATABASE_PGBOUNCER=true).
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+# every worker has its own connection pools, workers * (pool_size + max_overflow) per engine must fit max_connections
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+# concurrent requests per gevent worker
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 500))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # the gevent worker patches the standard library, psycopg2 waits in C and needs a wait callback to yield
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
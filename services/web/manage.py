@@ -10,6 +10,8 @@ COV = coverage.coverage(
 COV.start()
 
 from flask.cli import FlaskGroup
+from sqlalchemy import text, inspect
+from sqlalchemy.schema import CreateIndex, CreateColumn
 import click
 
 from project import app, db
@@ -17,7 +19,11 @@ from project.models.user import User
 from project.models.user import UserRole
 from project.models.group import Group
 from project.models.user_group_association import UserGroupAssociation
+from project.models.user_stats import UserStat
+from project.api.common.utils.serialization import JSON_BACKENDS, dumps
+from project.api.common.utils.db_json import row_json, json_rows, join_rows
 
+import timeit
 import unittest
 cli = FlaskGroup(app)
 
@@ -58,6 +64,123 @@ def seed_db():
     db.session.add(user_group_association2)
     db.session.commit()
 
+@cli.command("add_columns")
+def add_columns():
+    """
+    Adds the columns declared in the models that are missing from existing tables, e.g. generated search columns
+    Generated columns are computed for every row when added, which rewrites the table
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                click.echo(f'adding column {table.name}.{column.name}')
+                spec = CreateColumn(column).compile(dialect=db.engine.dialect)
+                db.session.execute(f'ALTER TABLE "{table.name}" ADD COLUMN {spec}')
+    db.session.commit()
+
+@cli.command("rebuild_user_stats")
+def rebuild_user_stats():
+    """
+    Rebuilds the user rollups behind /stats/users from scratch, installing their tables and triggers if missing
+    User writes are blocked while the rollups are recomputed
+    """
+    db.create_all()
+    UserStat.rebuild()
+    db.session.commit()
+
+def get_indexes_status() -> dict:
+    """
+    Get whether each index declared in the models exists and is valid, None for missing indexes
+    """
+    indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+    rows = db.session.execute(text('SELECT c.relname, i.indisvalid FROM pg_index i '
+                                   'JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = ANY(:names)'),
+                              {'names': [index.name for index in indexes]})
+    valid = dict(rows.fetchall())
+    return {index: valid.get(index.name) for index in indexes}
+
+@cli.command("create_indexes")
+def create_indexes():
+    """
+    Creates the indexes declared in the models that are missing, online with CREATE INDEX CONCURRENTLY
+    Invalid indexes left behind by a failed concurrent build are dropped and built again
+    """
+    status = get_indexes_status()
+    db.session.remove()
+    # concurrent index builds cannot run inside a transaction block
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        # operator classes such as gin_trgm_ops come from extensions
+        for extension in sorted(db.metadata.info.get('extensions', ())):
+            connection.execute(f'CREATE EXTENSION IF NOT EXISTS {extension}')
+        for index, valid in status.items():
+            if valid:
+                continue
+            if valid is False:
+                click.echo(f'dropping invalid index {index.name}')
+                connection.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"')
+            click.echo(f'creating index {index.name}')
+            statement = str(CreateIndex(index).compile(dialect=connection.dialect))
+            connection.execute(statement.replace('INDEX', 'INDEX CONCURRENTLY', 1))
+
+@cli.command("check_indexes")
+def check_indexes():
+    """
+    Checks which of the indexes declared in the models exist
+    """
+    status = get_indexes_status()
+    for index, valid in status.items():
+        state = 'missing' if valid is None else 'valid' if valid else 'invalid'
+        click.echo(f'{index.table.name}.{index.name}: {state}')
+    return 0 if all(status.values()) else 1
+
+@cli.command("benchmark_json")
+@click.option('--rows', default=100, help='users per response, as a list page with per_page=rows')
+@click.option('--repeat', default=500, help='responses serialized per backend')
+def benchmark_json(rows, repeat):
+    """
+    Compares the JSON backends serializing a page of users, no database needed
+    """
+    users = [User(email=f'user{index}@example.com', username=f'user{index}', name=f'User {index}')
+             for index in range(rows)]
+    for index, user in enumerate(users):
+        user.id = index + 1
+    page = {'page': 1, 'per_page': rows, 'number_of_pages': 10, 'has_next': True,
+            'users': [user.json() for user in users]}
+    outputs = {}
+    for name, backend in JSON_BACKENDS.items():
+        backend = backend()
+        outputs[name] = backend.dumps(page)
+        seconds = timeit.timeit(lambda: backend.dumps(page), number=repeat)
+        click.echo(f'{name}: {seconds / repeat * 1000:.3f} ms per response, {len(outputs[name])} bytes')
+    click.echo(f'same output: {len(set(outputs.values())) == 1}')
+
+
+@cli.command("benchmark_db_json")
+@click.option('--per-page', default=100, help='users per page')
+@click.option('--repeat', default=200, help='pages rendered per path')
+def benchmark_db_json(per_page, repeat):
+    """
+    Compares rendering a page of the users in the database as JSON by the app and by the database
+    """
+    query = User.query.order_by(User.created_at.desc()).limit(per_page)
+    fetch = json_rows(User, row_json(User))
+    serialize = User.serializer()
+
+    def app_page():
+        return dumps([serialize(user) for user in query.all()])
+
+    def db_page():
+        return join_rows(fetch(query))
+
+    outputs = {}
+    for name, render in (('app', app_page), ('database', db_page)):
+        outputs[name] = render()
+        seconds = timeit.timeit(render, number=repeat)
+        click.echo(f'{name}: {seconds / repeat * 1000:.3f} ms per page, {len(outputs[name])} bytes')
+    click.echo(f'same output: {len(set(outputs.values())) == 1}')
+
 @cli.command()
 @click.argument('file', required=False)
 def test(file):
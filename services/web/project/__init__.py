@@ -1,20 +1,29 @@
 import os
 from flask import Config
-from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_mail import Mail
 from celery import Celery
 from oauthlib.oauth2 import WebApplicationClient
 from .api.common.base_definitions import BaseFlask
+from .api.common.utils.cache import ResultCache, FragmentCache, PrincipalCache, TTLCache
+from .api.common.utils.compression import Compressor
+from .api.common.utils.query_guard import QueryGuard
+from .api.common.utils.routing import RoutingSQLAlchemy, ReplicaRouter
 
 # flask config
 conf = Config(root_path=os.path.abspath(os.path.dirname(__file__)))
 conf.from_object(os.getenv('APP_SETTINGS'))
 
 # instantiate the extensions
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 bcrypt = Bcrypt()
 mail = Mail()
+result_cache = ResultCache()
+fragment_cache = FragmentCache()
+principal_cache = PrincipalCache('user')
+query_guard = QueryGuard()
+replica_router = ReplicaRouter()
+compressor = Compressor()
 
 
 def create_app():
@@ -24,18 +33,26 @@ def create_app():
     db.init_app(app)
     bcrypt.init_app(app)
     mail.init_app(app)
+    result_cache.init_app(app)
+    fragment_cache.init_app(app)
+    principal_cache.init_app(app)
+    query_guard.init_app(app)
+    replica_router.init_app(app)
+    compressor.init_app(app)
 
     # register blueprints
     from .api.v1.auth import auth_blueprints
     from .api.v1.user import user_blueprints
     from .api.v1.admin import admin_blueprints
+    from .api.v1.batch import batch_blueprints
 
-    blueprints = [*auth_blueprints, *user_blueprints, *admin_blueprints]
+    blueprints = [*auth_blueprints, *user_blueprints, *admin_blueprints, *batch_blueprints]
     for blueprint in blueprints:
         app.register_blueprint(blueprint, url_prefix='/v1')
 
     app.github_client = WebApplicationClient(app.config['GITHUB_CLIENT_ID'])
     app.facebook_client = WebApplicationClient(app.config['FACEBOOK_CLIENT_ID'])
+    app.autocomplete_cache = TTLCache(app.config['AUTOCOMPLETE_CACHE_SIZE'], app.config['AUTOCOMPLETE_CACHE_TTL'])
     return app
 
 
@@ -72,6 +89,7 @@ app.register_error_handler(exceptions.UnauthorizedException, error_handlers.hand
 app.register_error_handler(exceptions.ForbiddenException, error_handlers.handle_exception)
 app.register_error_handler(exceptions.NotFoundException, error_handlers.handle_exception)
 app.register_error_handler(exceptions.ServerErrorException, error_handlers.handle_exception)
+app.register_error_handler(exceptions.StatementTimeoutException, error_handlers.handle_exception)
 app.register_error_handler(Exception, error_handlers.handle_general_exception)
 app.register_error_handler(HTTPException, error_handlers.handle_werkzeug_exception)
 
@@ -1,8 +1,10 @@
 import datetime, os, logging
-from flask import Flask, jsonify, Response
+from flask import Flask, Request, Response
 from flask.json import JSONEncoder
 from flask_cors import CORS
 
+from .utils.serialization import JSON_BACKENDS, BINARY_ENCODINGS, jsonify
+
 
 class BaseJSONEncoder(JSONEncoder):
     """
@@ -19,6 +21,22 @@ class BaseJSONEncoder(JSONEncoder):
             return list(iterable)
         return JSONEncoder.default(self, obj)
 
+class BaseRequest(Request):
+    """
+    Base request, get_json also decodes bodies sent in a binary encoding, e.g. application/msgpack
+    """
+    def get_json(self, force=False, silent=False, cache=True):
+        encoding = BINARY_ENCODINGS.get(self.mimetype)
+        if encoding is None:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        try:
+            return encoding.loads(self.get_data(cache=cache))
+        except ValueError as e:
+            if silent:
+                return None
+            return self.on_json_loading_failed(e)
+
+
 class BaseResponse(Response):
     """
     Base response
@@ -36,6 +54,7 @@ class BaseFlask(Flask):
     """
     Construct base application module
     """
+    request_class = BaseRequest
     response_class = BaseResponse
     json_encoder = BaseJSONEncoder # set up custom encoder to handle date as ISO8601 format
 
@@ -52,6 +71,7 @@ class BaseFlask(Flask):
         # set config
         app_settings = os.getenv('APP_SETTINGS')
         self.config.from_object(app_settings)
+        self.json_backend = JSON_BACKENDS[self.config['JSON_BACKEND']]()
 
         ## log for werkzeug
         # import functools
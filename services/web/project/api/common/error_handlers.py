@@ -1,7 +1,10 @@
-from flask import jsonify, json, current_app
+from flask import json, current_app
 from werkzeug.exceptions import NotFound, Unauthorized, Forbidden, MethodNotAllowed, NotImplemented, BadRequest
 from ...api.common.utils.exceptions import APIException, ServerErrorException, NotFoundException, UnauthorizedException, \
-    ForbiddenException, MethodNotAllowedException, NotImplementedException, BadRequestException
+    ForbiddenException, MethodNotAllowedException, NotImplementedException, BadRequestException, \
+    StatementTimeoutException
+from ...api.common.utils.helpers import is_statement_timeout
+from ...api.common.utils.serialization import jsonify
 
 def handle_exception(error: APIException):
     """
@@ -17,6 +20,8 @@ def handle_general_exception(e):
     Handle general exceptions
     """
     # current_app.logger.debug(e)
+    if is_statement_timeout(e):
+        return handle_exception(StatementTimeoutException())
     return handle_exception(ServerErrorException())
 
 def handle_werkzeug_exception(e):
@@ -0,0 +1,74 @@
+from flask import current_app, json, request
+from werkzeug.datastructures import Headers
+from werkzeug.test import EnvironBuilder
+
+from ....api.common.utils.exceptions import APIException, InvalidPayloadException, MethodNotAllowedException
+from ....api.common.utils.query_guard import STATEMENT_TIMEOUT_CAP
+
+# set on the environ of sub-requests, batches cannot be nested
+BATCH_ITEM = 'project.batch_item'
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# headers of the parent request every sub-request gets, they cannot be overridden per sub-request
+SHARED_HEADERS = ('Authorization', 'Cookie')
+# headers of sub-requests that are ignored, sub-responses are sent within the batch response,
+# encoded and compressed with it
+IGNORED_HEADERS = ('Accept', 'Accept-Encoding')
+# headers of sub-responses passed back to the client
+RESPONSE_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Location')
+
+
+def read_batch() -> list:
+    """
+    Read the sub-requests of a batch, {"requests": [{"method", "path", "headers", "body"}, ...]},
+    at most BATCH_MAX_REQUESTS of them
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get('requests') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise InvalidPayloadException(message='Expected a JSON object with a list of requests')
+    max_requests = current_app.config.get('BATCH_MAX_REQUESTS')
+    if len(items) > max_requests:
+        raise InvalidPayloadException(message=f'At most {max_requests} requests can be sent at once')
+    return items
+
+
+def item_error(error: APIException) -> dict:
+    """
+    Get the result of a sub-request that was not dispatched
+    """
+    return {'status': error.status_code, 'headers': {}, 'body': error.to_dict()}
+
+
+def dispatch(item, shared_environ: dict, statement_timeout: int) -> tuple:
+    """
+    Dispatch sub-request item within the app context of the batch, with the shared headers of the batch
+    and the values of shared_environ, e.g. its authenticated user
+    Returns its result and the cookies it set
+    """
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str) or \
+            not isinstance(item.get('headers', {}), dict):
+        return item_error(InvalidPayloadException(message='A request needs a path and optionally a method, '
+                                                          'headers and body')), []
+    method = str(item.get('method', 'GET')).upper()
+    if method not in BATCH_METHODS:
+        return item_error(MethodNotAllowedException()), []
+
+    headers = Headers({'Accept': 'application/json'})
+    for name, value in item['headers'].items() if 'headers' in item else ():
+        if name.title() not in SHARED_HEADERS + IGNORED_HEADERS:
+            headers.set(name, value)
+    for name in SHARED_HEADERS:
+        if name in request.headers:
+            headers.set(name, request.headers[name])
+    body = {'json': item['body']} if 'body' in item else {}
+    environ = EnvironBuilder(path=item['path'], method=method, base_url=request.url_root, headers=headers,
+                             environ_overrides={'REMOTE_ADDR': request.remote_addr, **shared_environ,
+                                                BATCH_ITEM: True, STATEMENT_TIMEOUT_CAP: statement_timeout},
+                             **body).get_environ()
+    with current_app.request_context(environ):
+        response = current_app.full_dispatch_request()
+        data = response.get_data()
+    result = {'status': response.status_code,
+              'headers': {name: response.headers[name] for name in RESPONSE_HEADERS if name in response.headers},
+              'body': (json.loads(data) if response.is_json else data.decode()) if data else None}
+    return result, response.headers.getlist('Set-Cookie')
@@ -0,0 +1,194 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from enum import Enum
+from itertools import repeat
+from threading import Lock
+from typing import Iterable, Type
+
+from flask import current_app, json, request
+from flask_bcrypt import generate_password_hash
+from sqlalchemy import Integer, any_, literal, or_
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from ....api.common.utils.exceptions import InvalidPayloadException, BadRequestException
+from ....api.common.utils.export import NDJSON_MIMETYPE
+from ....api.common.utils.filters import get_request_criteria
+
+try:
+    from gevent import monkey
+except ImportError:  # gevent is only installed for the gevent worker mode
+    monkey = None
+
+_hash_executor = None
+_hash_executor_pid = None
+_hash_executor_lock = Lock()
+
+
+def read_payloads() -> Iterable:
+    """
+    Read the payloads of a bulk request, a JSON array or NDJSON with one payload per line,
+    at most BULK_MAX_ROWS of them. Lines that are not valid JSON are yielded as None
+    """
+    max_rows = current_app.config.get('BULK_MAX_ROWS')
+    if request.mimetype == NDJSON_MIMETYPE:
+        payloads = (line for line in request.stream if line.strip())
+        payloads = (_loads(line) for line in payloads)
+    else:
+        payloads = request.get_json(silent=True)
+        if not isinstance(payloads, list):
+            raise InvalidPayloadException(message='Expected a JSON array or NDJSON')
+    for index, payload in enumerate(payloads):
+        if index >= max_rows:
+            raise InvalidPayloadException(message=f'At most {max_rows} rows can be sent at once')
+        yield payload
+
+
+def _loads(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def row_error(index: int, errors: list, code: int = 400) -> dict:
+    """
+    Get the result of a rejected row, in the shape of the validation errors of single requests
+    """
+    return {'index': index, 'code': code, 'message': 'Validation Error', 'errors': errors}
+
+
+def get_unique_columns(entity: Type) -> list:
+    """
+    Get the columns of entity with a unique constraint, besides the primary key
+    """
+    return [column for column in entity.__table__.columns if column.unique]
+
+
+def find_conflicts(entity: Type, rows: dict) -> dict:
+    """
+    Check unique columns of rows, {index: row}, against each other and the table in a single query
+    Returns {index: errors} of the rows that conflict
+    """
+    columns = [column for column in get_unique_columns(entity) if any(column.key in row for row in rows.values())]
+    conflicts = {}
+    if not columns:
+        return conflicts
+
+    seen = {column.key: set() for column in columns}
+    for index, row in rows.items():
+        for column in columns:
+            value = row.get(column.key)
+            if value is not None and value in seen[column.key]:
+                conflicts.setdefault(index, []).append({'field': column.key,
+                                                        'message': f'{column.key} is repeated in the batch'})
+            seen[column.key].add(value)
+
+    existing = {column.key: set() for column in columns}
+    criteria = [column.in_(seen[column.key] - {None}) for column in columns]
+    for values in entity.query.with_entities(*columns).filter(or_(*criteria)):
+        for column, value in zip(columns, values):
+            existing[column.key].add(value)
+    for index, row in rows.items():
+        for column in columns:
+            if row.get(column.key) in existing[column.key]:
+                conflicts.setdefault(index, []).append({'field': column.key,
+                                                        'message': f'{column.key} already exists'})
+    return conflicts
+
+
+def insert_rows(session, entity: Type, rows: dict) -> dict:
+    """
+    Insert rows, {index: row}, in chunks of BULK_CHUNK_SIZE with one multi row INSERT ... RETURNING each
+    Rows that hit a unique constraint in the meantime are skipped
+    Returns {index: id} of the inserted rows
+    """
+    first = next(iter(rows.values()))
+    key = next((column for column in get_unique_columns(entity) if column.key in first), None)
+    chunk_size = current_app.config.get('BULK_CHUNK_SIZE')
+    now = datetime.now()
+    items = list(rows.items())
+    ids = {}
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        values = [{'created_at': now, 'updated_at': now, **column_values(row)} for _, row in chunk]
+        statement = insert(entity.__table__).values(values).on_conflict_do_nothing()
+        if key is None:
+            # without a unique column every row is inserted and returned in order
+            inserted = session.execute(statement.returning(entity.id))
+            ids.update((index, id_) for (index, _), (id_,) in zip(chunk, inserted))
+        else:
+            inserted = {value: id_ for id_, value in session.execute(statement.returning(entity.id, key))}
+            ids.update((index, inserted[row[key.key]]) for index, row in chunk if row[key.key] in inserted)
+    return ids
+
+
+def column_values(row: dict) -> dict:
+    """
+    Convert the validated values of row to column values for statements that bypass the models, i.e. enums
+    """
+    return {name: value.value if isinstance(value, Enum) else value for name, value in row.items()}
+
+
+def get_ids() -> list:
+    """
+    Get the ids param of a bulk update or delete, e.g. ids=1,2,3, at most BULK_MAX_ROWS distinct ids
+    """
+    ids = request.args.get('ids', default='', type=str)
+    try:
+        ids = list(dict.fromkeys(int(id_) for id_ in ids.split(',') if id_.strip()))
+    except ValueError:
+        raise BadRequestException(message='ids must be a comma separated list of integers')
+    max_rows = current_app.config.get('BULK_MAX_ROWS')
+    if len(ids) > max_rows:
+        raise BadRequestException(message=f'At most {max_rows} ids can be sent at once')
+    return ids
+
+
+def get_bulk_criteria(entity: Type, ids: list, custom_filter=None) -> list:
+    """
+    Get the criteria selecting the rows of a bulk update or delete, the ids or else the filter and q params
+    Requests selecting neither are rejected rather than writing the whole table
+    """
+    if ids:
+        # a single array parameter keeps the statement text the same for any number of ids
+        criteria = [entity.id == any_(literal(ids, ARRAY(Integer)))]
+    else:
+        criteria = get_request_criteria(entity)
+        if not criteria:
+            raise BadRequestException(message='Select the rows with the ids, filter or q params')
+    if custom_filter is not None:
+        criteria.append(custom_filter)
+    return criteria
+
+
+def id_results(entity: Type, ids: list, written: list, code: int) -> list:
+    """
+    Get the result of every id of a bulk update or delete, ids that were not written do not exist
+    or are hidden by the custom filter
+    """
+    if not ids:
+        return [{'id': id_, 'code': code} for id_ in sorted(written)]
+    written = set(written)
+    return [{'id': id_, 'code': code} if id_ in written else
+            {'id': id_, 'code': 404, 'message': f'{entity.__tablename__} does not exist'} for id_ in ids]
+
+
+def hash_passwords(passwords: list) -> list:
+    """
+    Hash passwords with bcrypt at BCRYPT_LOG_ROUNDS across a pool of BULK_HASH_WORKERS processes,
+    in process under gevent, whose monkey patching process pools do not support
+    """
+    global _hash_executor, _hash_executor_pid
+    rounds = current_app.config.get('BCRYPT_LOG_ROUNDS')
+    if monkey is not None and monkey.is_module_patched('threading'):
+        return [generate_password_hash(password, rounds).decode() for password in passwords]
+    workers = current_app.config.get('BULK_HASH_WORKERS') or os.cpu_count()
+    with _hash_executor_lock:
+        # the pool of a parent process is unusable after a fork, e.g. by a preloading gunicorn
+        if _hash_executor is None or _hash_executor_pid != os.getpid():
+            _hash_executor = ProcessPoolExecutor(max_workers=workers)
+            _hash_executor_pid = os.getpid()
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return [password_hash.decode() for password_hash in
+            _hash_executor.map(generate_password_hash, passwords, repeat(rounds), chunksize=chunksize)]
@@ -0,0 +1,291 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class TTLCache:
+    """
+    Bounded in-process cache, entries expire after ttl seconds and the least recently used are evicted first
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """
+        Get value for key, or default if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        """
+        Set value for key, evicting the least recently used entry when full
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Remove key from the cache
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Remove every entry from the cache
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """
+        Get hit/miss counters and size of the cache
+        """
+        requests = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests if requests else None,
+                'size': len(self),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl}
+
+
+class FragmentCache:
+    """
+    Cache of the encoded JSON of single rows, keyed by table, representation, id and updated_at.
+    A row that is written gets a new updated_at and so a new key, its stale fragments are never served again
+    and age out of the LRU. Memory is bounded by the total size of the fragments, FRAGMENT_CACHE_MAX_BYTES.
+    Each process has its own cache.
+    """
+
+    def __init__(self, app=None):
+        self.max_bytes = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES')
+
+    @property
+    def enabled(self) -> bool:
+        return current_app.config.get('FRAGMENT_CACHE_MAX_BYTES') > 0
+
+    def get(self, key):
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def set(self, key, fragment: bytes):
+        """
+        Set fragment for key, evicting the least recently used fragments until they fit in max_bytes
+        """
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous)
+            self._entries[key] = fragment
+            self.bytes += len(fragment)
+            while self.bytes > self.max_bytes and self._entries:
+                self.bytes -= len(self._entries.popitem(last=False)[1])
+
+    def render(self, representation: tuple, rows: list, encode: Callable) -> bytes:
+        """
+        Render rows, with their id and updated_at, as a JSON array of their fragments,
+        representation identifies the table and the fields of the fragments
+        encode gets the rows whose fragments are missing and returns their fragments by id,
+        rows it leaves out, e.g. because they were deleted meanwhile, are left out of the array
+        """
+        keys = {row.id: (*representation, row.id, row.updated_at) for row in rows}
+        fragments = {id_: self.get(key) for id_, key in keys.items()} if self.enabled else {}
+        missing = [row for row in rows if fragments.get(row.id) is None]
+        if missing:
+            for id_, fragment in encode(missing).items():
+                fragments[id_] = fragment
+                if self.enabled:
+                    self.set(keys[id_], fragment)
+        return b'[' + b','.join(fragments[row.id] for row in rows if fragments.get(row.id) is not None) + b']'
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Get hit/miss counters and size of the cache
+        """
+        requests = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests if requests else None,
+                'size': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes}
+
+
+class ResultCache:
+    """
+    Cache of BaseAPI GET results, keyed by entity and the normalized request.
+    Every committed write to a table bumps its generation, which is part of the key,
+    so stale results of that entity are never served again and age out of the LRU.
+    Each process has its own cache, results written by another process expire after RESULT_CACHE_TTL.
+    """
+
+    def __init__(self, app=None):
+        self.cache = None
+        self.generations = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.cache = TTLCache(app.config.get('RESULT_CACHE_SIZE'), app.config.get('RESULT_CACHE_TTL'))
+        event.listen(Session, 'after_flush', self._collect_written_tables)
+        event.listen(Session, 'after_commit', self._invalidate_written_tables)
+        event.listen(Session, 'after_rollback', self._discard_written_tables)
+
+    @property
+    def enabled(self) -> bool:
+        return current_app.config.get('RESULT_CACHE_TTL') > 0
+
+    def key(self, entity, *args) -> tuple:
+        """
+        Get cache key for a result of entity, args must be hashable and identify the result
+        """
+        return (entity.__tablename__, self.generations.get(entity.__tablename__, 0), *args)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        if self.enabled:
+            self.cache.set(key, value, ttl=current_app.config.get('RESULT_CACHE_TTL'))
+
+    def invalidate(self, *tablenames):
+        """
+        Invalidate every cached result of the given tables
+        """
+        for tablename in tablenames:
+            self.generations[tablename] = self.generations.get(tablename, 0) + 1
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+    @staticmethod
+    def mark_written(session, *tablenames):
+        """
+        Invalidate the tables on commit of session, for writes that bypass the unit of work, e.g. bulk statements
+        """
+        session.info.setdefault('written_tables', set()).update(tablenames)
+
+    @staticmethod
+    def _collect_written_tables(session, flush_context):
+        written = session.info.setdefault('written_tables', set())
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            written.add(instance.__tablename__)
+
+    def _invalidate_written_tables(self, session):
+        self.invalidate(*session.info.pop('written_tables', ()))
+
+    @staticmethod
+    def _discard_written_tables(session):
+        session.info.pop('written_tables', None)
+
+
+class PrincipalCache:
+    """
+    Cache of the (active, role) of users by id, so authenticating a request does not load its user.
+    Users of tablename written through a session are invalidated when it commits, statements that bypass
+    the unit of work, e.g. bulk updates, mark the ids they wrote with mark_written.
+    Each process has its own cache unless a shared one with the get/set/delete methods of TTLCache is given
+    to init_app, users written by another process are then seen after PRINCIPAL_CACHE_TTL at the latest.
+    """
+
+    def __init__(self, tablename: str, app=None, cache=None):
+        self.tablename = tablename
+        self.cache = None
+        if app is not None:
+            self.init_app(app, cache)
+
+    def init_app(self, app, cache=None):
+        self.cache = cache or TTLCache(app.config.get('PRINCIPAL_CACHE_SIZE'), app.config.get('PRINCIPAL_CACHE_TTL'))
+        event.listen(Session, 'after_flush', self._collect_written_ids)
+        event.listen(Session, 'after_commit', self._invalidate_written_ids)
+        event.listen(Session, 'after_rollback', self._discard_written_ids)
+
+    @property
+    def enabled(self) -> bool:
+        return current_app.config.get('PRINCIPAL_CACHE_TTL') > 0
+
+    def get(self, user_id: int):
+        if not self.enabled:
+            return None
+        return self.cache.get(user_id)
+
+    def set(self, user_id: int, active: bool, role: int):
+        if self.enabled:
+            self.cache.set(user_id, (active, role), ttl=current_app.config.get('PRINCIPAL_CACHE_TTL'))
+
+    def invalidate(self, *user_ids):
+        for user_id in user_ids:
+            self.cache.delete(user_id)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+    def mark_written(self, session, tablename: str, ids):
+        """
+        Invalidate the ids on commit of session when they are users
+        """
+        if tablename == self.tablename:
+            session.info.setdefault('written_principals', set()).update(ids)
+
+    def _collect_written_ids(self, session, flush_context):
+        written = session.info.setdefault('written_principals', set())
+        for instance in (*session.dirty, *session.deleted):
+            if instance.__tablename__ == self.tablename:
+                written.add(instance.id)
+
+    def _invalidate_written_ids(self, session):
+        self.invalidate(*session.info.pop('written_principals', ()))
+
+    @staticmethod
+    def _discard_written_ids(session):
+        session.info.pop('written_principals', None)
@@ -0,0 +1,89 @@
+import zlib
+from typing import Iterable
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is preferred when installed, gzip is always available
+    brotli = None
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class Compressor:
+    """
+    Compresses responses with the best content coding the client accepts with Accept-Encoding, br or gzip.
+    Only COMPRESS_MIMETYPES are compressed, so images and archives that are compressed already are not,
+    nor are responses with a Content-Encoding. Buffered responses smaller than COMPRESS_MIN_SIZE bytes are sent as is,
+    streamed responses are compressed chunk by chunk as they are sent.
+    Strong ETags become weak, the compressed and the plain representations are not byte for byte the same.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self._compress)
+
+    def get_encoding(self):
+        """
+        Get the content coding of the response to the current request, None for no compression
+        """
+        encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        return request.accept_encodings.best_match(encodings)
+
+    def _compress(self, response):
+        if not current_app.config.get('COMPRESS') or request.method == 'HEAD' or response.status_code < 200 or \
+                response.status_code in (204, 304) or 'Content-Encoding' in response.headers or \
+                response.mimetype not in current_app.config.get('COMPRESS_MIMETYPES'):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.get_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self.compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < current_app.config.get('COMPRESS_MIN_SIZE'):
+                return response
+            response.set_data(self.compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        """
+        Compress data with encoding at the configured level
+        """
+        if encoding == 'br':
+            return brotli.compress(data, quality=current_app.config.get('COMPRESS_BR_LEVEL'))
+        compressor = zlib.compressobj(current_app.config.get('COMPRESS_LEVEL'), zlib.DEFLATED, GZIP_WBITS)
+        return compressor.compress(data) + compressor.flush()
+
+    def compress_stream(self, chunks: Iterable, encoding: str) -> Iterable:
+        """
+        Compress the chunks of a streamed response, a chunk is sent whenever the compressor has output
+        """
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=current_app.config.get('COMPRESS_BR_LEVEL'))
+            compress, finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(current_app.config.get('COMPRESS_LEVEL'), zlib.DEFLATED, GZIP_WBITS)
+            compress, finish = compressor.compress, compressor.flush
+        try:
+            for chunk in chunks:
+                chunk = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+                if chunk:
+                    yield chunk
+            yield finish()
+        finally:
+            # closes the generator of the view when the client goes away
+            if hasattr(chunks, 'close'):
+                chunks.close()
@@ -0,0 +1,56 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import current_app, request
+
+from ....api.common.utils.serialization import get_media_type, JSON_MIMETYPE
+
+
+def make_etag(*parts) -> str:
+    """
+    Make a strong ETag from the parts identifying a representation, e.g. id and updated_at,
+    and the media type it is encoded in
+    """
+    media_type = get_media_type()
+    if media_type != JSON_MIMETYPE:
+        parts = (media_type, *parts)
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def http_date(date: datetime) -> datetime:
+    """
+    Convert a naive local datetime, as stored in the database, to an aware UTC datetime with HTTP date precision
+    """
+    return date.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def is_not_modified(etag: str, last_modified: datetime = None) -> bool:
+    """
+    Check the conditional headers of request against the validators,
+    If-None-Match takes precedence over If-Modified-Since
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        if_modified_since = request.if_modified_since
+        if if_modified_since.tzinfo is None:
+            if_modified_since = if_modified_since.replace(tzinfo=timezone.utc)
+        return http_date(last_modified) <= if_modified_since
+    return False
+
+
+def set_validators(response, etag: str, last_modified: datetime = None):
+    """
+    Set ETag and Last-Modified headers on response
+    """
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = http_date(last_modified)
+    return response
+
+
+def not_modified(etag: str, last_modified: datetime = None):
+    """
+    Empty 304 Not Modified response with the validators
+    """
+    return set_validators(current_app.response_class(status=304), etag, last_modified)
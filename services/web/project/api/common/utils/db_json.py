@@ -0,0 +1,89 @@
+"""
+Database side JSON rendering of list pages
+
+Postgres renders the JSON of every row of the page, the rows are joined and passed through untouched,
+without building models or dicts. The text is the compact output of the app with the orjson backend:
+keys are sorted (JSON_SORT_KEYS), datetimes are in isoformat and strings are escaped by to_json,
+which leaves non ASCII characters as UTF-8.
+"""
+from typing import Type
+
+from flask import current_app
+from sqlalchemy import DateTime, Text, case, cast, func, literal_column
+from sqlalchemy.orm import Query
+
+# isoformat of a timestamp, microseconds are left out when they are 0
+ISO_SECONDS = 'YYYY-MM-DD"T"HH24:MI:SS'
+ISO_MICROSECONDS = 'YYYY-MM-DD"T"HH24:MI:SS.US'
+
+
+def json_value(column):
+    """
+    Get the JSON text of column
+    """
+    if isinstance(column.type, DateTime):
+        column = case([(func.date_trunc('second', column) == column, func.to_char(column, ISO_SECONDS))],
+                      else_=func.to_char(column, ISO_MICROSECONDS))
+    return func.coalesce(cast(func.to_json(column), Text), literal_column("'null'", Text))
+
+
+def row_json(entity: Type, fields: list = None):
+    """
+    Get the expression rendering a row of entity as the JSON of fields, or of its __json__ fields when None,
+    None when a field is not a column or enum name and the page has to be serialized by the app
+    """
+    columns = {column.key: column for column in entity.__mapper__.column_attrs}
+    fields = list(dict.fromkeys(fields or entity.__json__))
+    if current_app.config.get('JSON_SORT_KEYS'):
+        fields.sort()
+    parts = []
+    for index, field in enumerate(fields):
+        if field in entity.__enum_names__:
+            column, enum = entity.__enum_names__[field]
+            value = json_value(case({member.value: member.name for member in enum}, value=getattr(entity, column)))
+        elif field in columns:
+            value = json_value(getattr(entity, field))
+        else:
+            return None
+        key = ('{' if index == 0 else ',') + f'"{field}":'
+        parts.extend([literal_column(f"'{key}'", Text), value])
+    return func.concat(*parts, literal_column("'}'", Text))
+
+
+def json_rows(entity: Type, expression):
+    """
+    Get the function fetching the rows of a page query as (id, updated_at, sortable columns..., json),
+    the rows take the place of models in pagination
+    """
+    columns = [getattr(entity, name) for name in dict.fromkeys(('id', 'updated_at', *entity.__sortable__))]
+
+    def fetch(query: Query) -> list:
+        return query.with_entities(*columns, expression.label('json')).all()
+    return fetch
+
+
+def key_rows(entity: Type):
+    """
+    Get the function fetching the rows of a page query as (id, updated_at, sortable columns...),
+    for pages whose rows are rendered apart, see render_rows
+    """
+    columns = [getattr(entity, name) for name in dict.fromkeys(('id', 'updated_at', *entity.__sortable__))]
+
+    def fetch(query: Query) -> list:
+        return query.with_entities(*columns).all()
+    return fetch
+
+
+def render_rows(entity: Type, expression, rows: list) -> dict:
+    """
+    Render the JSON of rows with expression, by id, rows deleted since they were read are left out
+    """
+    query = entity.query.with_entities(entity.id, expression).filter(entity.id.in_([row.id for row in rows]))
+    return {id_: json.encode() for id_, json in query}
+
+
+def join_rows(rows: list) -> bytes:
+    """
+    Join the JSON of rows into a JSON array
+    """
+    return b'[' + ','.join(row.json for row in rows).encode() + b']'
@@ -1,9 +1,42 @@
 from flask import request, current_app
 from functools import wraps
+from sqlalchemy import select
 
+from .... import db, principal_cache
 from ....api.common.utils.exceptions import UnauthorizedException, ForbiddenException
+from ....api.common.utils.routing import ReplicaRouter
 from ....models.user import User, UserRole
 
+# (id, role) of the active user of the request's token, shared with the sub-requests of a batch
+PRINCIPAL = 'project.principal'
+
+
+def get_principal() -> tuple:
+    """
+    Get (id, role) of the active user of the request's token,
+    the token is decoded once per request or batch and the user loaded when it is not in the principal cache
+    """
+    if PRINCIPAL not in request.environ:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            raise UnauthorizedException()
+        auth_token = auth_header.split(" ")[1]
+        user_id = User.decode_auth_token(auth_token)
+        principal = principal_cache.get(user_id)
+        if principal is None:
+            # read from the primary, a lagging replica could cache a principal that was just revoked
+            row = db.session.execute(select([User.active, User.role]).where(User.id == user_id),
+                                     bind=db.get_engine()).first()
+            if row is None:
+                raise UnauthorizedException()
+            principal = (row.active, row.role)
+            principal_cache.set(user_id, *principal)
+        active, role = principal
+        if not active:
+            raise UnauthorizedException()
+        request.environ[PRINCIPAL] = (user_id, UserRole(role))
+    return request.environ[PRINCIPAL]
+
 
 def privileges(role):
     """
@@ -13,15 +46,7 @@ def privileges(role):
     def actual_decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                raise UnauthorizedException()
-            auth_token = auth_header.split(" ")[1]
-            user_id = User.decode_auth_token(auth_token)
-            user = User.get(user_id)
-            if not user or not user.active:
-                raise UnauthorizedException()
-            user_role = UserRole(user.role)
+            user_id, user_role = get_principal()
             if not bool(user_role & role):
                 raise ForbiddenException()
             return f(user_id, *args, **kwargs)
@@ -29,19 +54,23 @@ def privileges(role):
     return actual_decorator
 
 
+def read_primary(f):
+    """
+    Decorator to read from the primary in read only methods that write based on what they read
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        ReplicaRouter.use_primary()
+        return f(*args, **kwargs)
+    return decorated_function
+
+
 def authenticate(f):
     """
     Decorator to authenticate users based on token
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            raise UnauthorizedException()
-        auth_token = auth_header.split(" ")[1]
-        user_id = User.decode_auth_token(auth_token)
-        user = User.get(user_id)
-        if not user or not user.active:
-            raise UnauthorizedException()
+        user_id, _ = get_principal()
         return f(user_id, *args, **kwargs)
     return decorated_function
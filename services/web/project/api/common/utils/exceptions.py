@@ -88,6 +88,16 @@ class ServerErrorException(APIException):
         super().__init__(message=message, status_code=500, payload=payload, name=name)
 
 
+class StatementTimeoutException(APIException):
+    """
+    504 Statement Timeout Exception
+    """
+
+    def __init__(self, message: str = 'The query took too long to run, narrow it down and try again', payload=None,
+                 name='Statement Timeout'):
+        super().__init__(message=message, status_code=504, payload=payload, name=name)
+
+
 class NotImplementedException(APIException):
     """
     501 Not Implemented Exception
@@ -0,0 +1,54 @@
+import csv
+import io
+from datetime import date
+from typing import Callable, Iterable
+
+from flask import current_app
+
+from ....api.common.utils.serialization import dumps
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CSV_MIMETYPE = 'text/csv'
+
+# Export mimetypes mapped to their file extension
+EXPORT_FORMATS = {NDJSON_MIMETYPE: 'ndjson', CSV_MIMETYPE: 'csv'}
+
+
+def chunked(lines: Iterable[str]) -> Iterable[str]:
+    """
+    Join lines into chunks of EXPORT_CHUNK_SIZE, so the response is not written one row at a time
+    """
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE')
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def ndjson_lines(models: Iterable, serialize: Callable) -> Iterable[str]:
+    """
+    Generate newline delimited JSON for models, one serialized model per line
+    """
+    return chunked(dumps(serialize(model)).decode() + '\n' for model in models)
+
+
+def csv_lines(models: Iterable, fields: list, serialize: Callable) -> Iterable[str]:
+    """
+    Generate CSV for models with a header row of fields, serialize must return the fields in that order,
+    dates are written in ISO8601 format as in JSON
+    """
+    def rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for model in models:
+            writer.writerow([value.isoformat() if isinstance(value, date) else value
+                             for value in serialize(model).values()])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    return chunked(rows())
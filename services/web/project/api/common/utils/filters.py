@@ -0,0 +1,313 @@
+"""
+Filter language for list endpoints
+
+    filter   := or
+    or       := and (OR and)*
+    and      := not (AND not)*
+    not      := NOT not | '(' or ')' | compare
+    compare  := FIELD OP VALUE | FIELD [NOT] IN '(' VALUE (',' VALUE)* ')' | FIELD IS [NOT] NULL
+    OP       := = | != | <> | < | <= | > | >= | LIKE | ILIKE
+    VALUE    := 'string' | number | TRUE | FALSE
+
+    order_by := FIELD [ASC | DESC] (',' FIELD [ASC | DESC])*
+
+e.g. (active = true and (role = 2 or username like 'adm%'))
+
+Fields are checked against the entity's __filterable__ (or __sortable__ for order_by) columns and values
+are sent as bound parameters. Filters are compiled per shape, that is the filter with its values taken out,
+so repeated filters only need to be tokenized and always produce the same SQL text.
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Type
+
+from sqlalchemy import and_, or_, not_
+from sqlalchemy.orm import Query
+
+from ....api.common.utils.exceptions import BadRequestException
+from ....api.common.utils.helpers import get_query_from_text, load_fields
+from ....api.common.utils.search import get_search_text, search_condition
+
+FILTER_CACHE_SIZE = 512
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<string>'(?:[^']|'')*')
+   |(?P<number>-?\d+(?:\.\d+)?)
+   |(?P<op><=|>=|!=|<>|=|<|>)
+   |(?P<punct>[(),])
+   |(?P<word>[A-Za-z_][A-Za-z0-9_]*)
+)""", re.VERBOSE)
+
+_KEYWORDS = {'and', 'or', 'not', 'in', 'is', 'null', 'like', 'ilike', 'asc', 'desc'}
+
+_OPERATORS = {
+    '=': lambda column, value: column == value,
+    '!=': lambda column, value: column != value,
+    '<>': lambda column, value: column != value,
+    '<': lambda column, value: column < value,
+    '<=': lambda column, value: column <= value,
+    '>': lambda column, value: column > value,
+    '>=': lambda column, value: column >= value,
+    'like': lambda column, value: column.like(value),
+    'ilike': lambda column, value: column.ilike(value),
+}
+
+VALUE = ('value',)
+
+
+class FilterError(BadRequestException):
+    """
+    400 Invalid filter or order_by
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message=f'Invalid filter: {message}')
+
+
+def tokenize(text: str) -> tuple:
+    """
+    Split text into (shape, values), where shape has every literal replaced by VALUE
+    """
+    shape, values = [], []
+    position, text = 0, text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise FilterError(f'unexpected character at {position}')
+        position = match.end()
+        kind, token = match.lastgroup, match.group(match.lastgroup)
+        if kind == 'string':
+            shape.append(VALUE)
+            values.append(token[1:-1].replace("''", "'"))
+        elif kind == 'number':
+            shape.append(VALUE)
+            values.append(token)
+        elif kind == 'word' and token.lower() in ('true', 'false'):
+            shape.append(VALUE)
+            values.append(token.lower() == 'true')
+        elif kind == 'word' and token.lower() in _KEYWORDS:
+            shape.append(('keyword', token.lower()))
+        elif kind == 'op':
+            shape.append(('keyword', token))
+        else:
+            shape.append((kind, token))
+    return tuple(shape), values
+
+
+def coerce(column, value):
+    """
+    Convert a literal to the python type of column
+    """
+    python_type = column.type.python_type
+    if isinstance(value, bool) != (python_type is bool):
+        raise FilterError(f'{value} is not a valid value for {column.key}')
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        return python_type(value)
+    except (TypeError, ValueError):
+        raise FilterError(f'{value} is not a valid value for {column.key}')
+
+
+class _Parser:
+    """
+    Recursive descent parser turning a filter shape into a builder function,
+    the builder takes the filter values and returns the SQLAlchemy criterion
+    """
+
+    def __init__(self, entity: Type, shape: tuple):
+        self.entity = entity
+        self.shape = shape
+        self.position = 0
+        self.slot = 0
+
+    def peek(self, *expected) -> bool:
+        if self.position >= len(self.shape):
+            return False
+        return not expected or self.shape[self.position] in expected
+
+    def describe(self) -> str:
+        if not self.peek():
+            return 'end of filter'
+        token = self.shape[self.position]
+        return 'value' if token == VALUE else token[1]
+
+    def take(self, *expected) -> tuple:
+        if not self.peek(*expected):
+            raise FilterError(f'unexpected {self.describe()}')
+        token = self.shape[self.position]
+        self.position += 1
+        return token
+
+    def next_slot(self) -> int:
+        self.take(VALUE)
+        self.slot += 1
+        return self.slot - 1
+
+    def column(self, whitelist: tuple):
+        if not self.peek() or self.shape[self.position][0] != 'word' or self.shape[self.position][1] not in whitelist:
+            raise FilterError(f'{self.describe()} is not a valid field')
+        _, name = self.take()
+        return getattr(self.entity, name)
+
+    def parse(self):
+        builder = self.parse_or()
+        if self.peek():
+            raise FilterError(f'unexpected {self.describe()}')
+        return builder
+
+    def parse_or(self):
+        builders = [self.parse_and()]
+        while self.peek(('keyword', 'or')):
+            self.take()
+            builders.append(self.parse_and())
+        if len(builders) == 1:
+            return builders[0]
+        return lambda values: or_(*[builder(values) for builder in builders])
+
+    def parse_and(self):
+        builders = [self.parse_not()]
+        while self.peek(('keyword', 'and')):
+            self.take()
+            builders.append(self.parse_not())
+        if len(builders) == 1:
+            return builders[0]
+        return lambda values: and_(*[builder(values) for builder in builders])
+
+    def parse_not(self):
+        if self.peek(('keyword', 'not')):
+            self.take()
+            builder = self.parse_not()
+            return lambda values: not_(builder(values))
+        if self.peek(('punct', '(')):
+            self.take()
+            builder = self.parse_or()
+            self.take(('punct', ')'))
+            return builder
+        return self.parse_compare()
+
+    def parse_compare(self):
+        column = self.column(self.entity.__filterable__)
+
+        if self.peek(('keyword', 'is')):
+            self.take()
+            negate = self.peek(('keyword', 'not'))
+            if negate:
+                self.take()
+            self.take(('keyword', 'null'))
+            return (lambda values: column.isnot(None)) if negate else (lambda values: column.is_(None))
+
+        negate = self.peek(('keyword', 'not'))
+        if negate:
+            self.take()
+        if negate or self.peek(('keyword', 'in')):
+            self.take(('keyword', 'in'))
+            self.take(('punct', '('))
+            slots = [self.next_slot()]
+            while self.peek(('punct', ',')):
+                self.take()
+                slots.append(self.next_slot())
+            self.take(('punct', ')'))
+            if negate:
+                return lambda values: column.notin_([coerce(column, values[slot]) for slot in slots])
+            return lambda values: column.in_([coerce(column, values[slot]) for slot in slots])
+
+        _, operator = self.take(*[('keyword', operator) for operator in _OPERATORS])
+        if operator in ('like', 'ilike') and column.type.python_type is not str:
+            raise FilterError(f'{operator} is only supported on text fields')
+        slot = self.next_slot()
+        return lambda values: _OPERATORS[operator](column, coerce(column, values[slot]))
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def compile_filter(entity: Type, shape: tuple):
+    """
+    Compile a filter shape for entity into a builder, cached per (entity, shape)
+    """
+    return _Parser(entity, shape).parse()
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def compile_order_by(entity: Type, text: str) -> tuple:
+    """
+    Compile order_by text for entity into a tuple of order by clauses
+    """
+    shape, values = tokenize(text)
+    if values:
+        raise FilterError('order_by does not take values')
+    parser = _Parser(entity, shape)
+    clauses = []
+    while True:
+        column = parser.column(entity.__sortable__)
+        if parser.peek(('keyword', 'desc')):
+            parser.take()
+            clauses.append(column.desc())
+        else:
+            if parser.peek(('keyword', 'asc')):
+                parser.take()
+            clauses.append(column.asc())
+        if not parser.peek():
+            return tuple(clauses)
+        parser.take(('punct', ','))
+
+
+def parse_filter(entity: Type, text: str) -> list:
+    """
+    Parse filter text into a list of criteria for entity, empty when there is no filter
+    """
+    shape, values = tokenize(text)
+    if not shape:
+        return []
+    return [compile_filter(entity, shape)(values)]
+
+
+def parse_order_by(entity: Type, text: str) -> tuple:
+    """
+    Parse order_by text into order by clauses for entity, empty when there is no order_by
+    """
+    if not text.strip():
+        return ()
+    return compile_order_by(entity, text.strip())
+
+
+def get_request_criteria(entity: Type) -> list:
+    """
+    Get the criteria of the filter and q (search) params from request, empty when there are none
+    """
+    criteria = parse_filter(entity, get_query_from_text('filter'))
+    search = search_condition(entity, get_search_text())
+    if search is not None:
+        criteria.append(search)
+    return criteria
+
+
+def get_filtered_query(entity: Type, fields: list = None, custom_filter=None) -> Query:
+    """
+    Get query for entity with the filter and q (search) params from request applied,
+    loading only the columns for fields
+    Custom filter allows us to pass additional criterion, such as to limit visibility
+    """
+    criteria = get_request_criteria(entity)
+    if custom_filter is not None:
+        criteria.append(custom_filter)
+    return load_fields(entity.query, entity, fields).filter(*criteria)
+
+
+def has_request_criteria() -> bool:
+    """
+    Check whether the request narrows or orders the query with the filter, order_by or q params
+    """
+    return bool(get_query_from_text('filter').strip() or get_query_from_text('order_by').strip() or get_search_text())
+
+
+def get_filter_key(custom_filter=None) -> tuple:
+    """
+    Get a hashable normalized form of the filter and order_by params plus custom_filter, for caching results
+    """
+    filter_shape, filter_values = tokenize(get_query_from_text('filter'))
+    order_by_shape, _ = tokenize(get_query_from_text('order_by'))
+    custom_filter_key = None
+    if custom_filter is not None:
+        custom_filter_key = (str(custom_filter), repr(sorted(custom_filter.compile().params.items())))
+    return filter_shape, tuple(filter_values), order_by_shape, get_search_text(), custom_filter_key
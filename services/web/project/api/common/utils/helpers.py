@@ -1,11 +1,13 @@
 from contextlib import contextmanager
 from datetime import datetime
 from flask import current_app, request
+from psycopg2 import errorcodes
 from sqlalchemy import exc
+from sqlalchemy.orm import Query, load_only
 from urllib import parse
 
 from ....api.common.utils.exceptions import ServerErrorException, InvalidPayloadException, NotFoundException, \
-    ValidationException
+    ValidationException, BadRequestException, StatementTimeoutException
 
 
 @contextmanager
@@ -19,11 +21,20 @@ def session_scope(session):
     except (InvalidPayloadException, NotFoundException, ValidationException) as e:
         session.rollback()
         raise e
-    except exc.SQLAlchemyError:
+    except exc.SQLAlchemyError as e:
         session.rollback()
+        if is_statement_timeout(e):
+            raise StatementTimeoutException()
         raise ServerErrorException()
 
 
+def is_statement_timeout(error: Exception) -> bool:
+    """
+    Check whether error is a statement cancelled by the statement timeout
+    """
+    return isinstance(error, exc.DBAPIError) and getattr(error.orig, 'pgcode', None) == errorcodes.QUERY_CANCELED
+
+
 def get_date(date: str) -> datetime:
     """
     Convert str to date in a specific format
@@ -42,19 +53,56 @@ def get_query_from_text(query: str) -> str:
     """
     Get query from text from request
     Query must have (, ) brackets, this method essentially removes the trailing brackets
+    The result is parsed with the filter language in filters.py, it is never passed to the database as SQL
     """
     query = request.args.get(query, default='', type=str)
     query = query[1:-1]
     return parse.unquote(query)
 
 
+def get_fields(entity) -> list:
+    """
+    Get fields selected with the fields param from request, e.g. fields=id,username,name
+    Returns None when no fields are selected, meaning the full representation
+    """
+    fields = request.args.get('fields', default='', type=str)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if not fields:
+        return None
+    invalid = [field for field in fields if field not in entity.__selectable__]
+    if invalid:
+        raise BadRequestException(message=f'Invalid fields: {", ".join(invalid)}')
+    return fields
+
+
+def load_fields(query: Query, entity, fields: list) -> Query:
+    """
+    Load only the columns needed to compute fields, the primary key and updated_at,
+    used for the response validators, are always loaded
+    """
+    if not fields:
+        return query
+    columns = {'updated_at', *(column for field in fields for column in entity.__selectable__[field])}
+    return query.options(load_only(*columns))
+
+
+def explain(query: Query) -> dict:
+    """
+    Get the planner's estimated top plan node for query without executing it
+    """
+    connection = query.session.connection()
+    compiled = query.statement.compile(dialect=connection.dialect)
+    plan = connection.execute(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params).scalar()
+    return plan[0]['Plan']
+
+
 def register_api(blueprint, view, endpoint, url, pk='id', pk_type='int'):
     """
     Register CRUD endpoints for API
     """
     view_func = view.as_view(endpoint)
     blueprint.add_url_rule(url, defaults={pk: None},
-                           view_func=view_func, methods=['GET', ])
-    blueprint.add_url_rule(url, view_func=view_func, methods=['POST', ])
+                           view_func=view_func, methods=['GET', 'DELETE'])
+    blueprint.add_url_rule(url, view_func=view_func, methods=['POST', 'PATCH'])
     blueprint.add_url_rule(f'{url}<{pk_type}:{pk}>', view_func=view_func,
                            methods=['GET', 'PUT', 'DELETE'])
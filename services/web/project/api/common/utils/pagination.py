@@ -0,0 +1,140 @@
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from enum import Enum
+from typing import Type, Callable
+
+from flask import current_app, request
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, undefer
+
+from ....api.common.utils.exceptions import BadRequestException
+from ....api.common.utils.helpers import explain
+from ....api.common.utils.query_guard import check_cost
+
+
+class CountMode(Enum):
+    """
+    How the total behind number_of_pages is obtained
+    """
+    EXACT = 'exact'  # COUNT(*) over the filtered query
+    ESTIMATE = 'estimate'  # row estimate from the planner statistics
+    NONE = 'none'  # skip counting, only report whether there is a next page
+
+
+def get_per_page() -> int:
+    """
+    Get per_page from request, falling back to default and capped by MAX_PER_PAGE
+    """
+    per_page = request.args.get('per_page', current_app.config.get('POSTS_PER_PAGE'), type=int)
+    if per_page < 1:
+        per_page = current_app.config.get('POSTS_PER_PAGE')
+    return min(per_page, current_app.config.get('MAX_PER_PAGE'))
+
+
+def get_count_mode() -> CountMode:
+    """
+    Get count mode from request, falling back to PAGINATION_COUNT_MODE
+    """
+    mode = request.args.get('count', current_app.config.get('PAGINATION_COUNT_MODE'), type=str)
+    try:
+        return CountMode(mode)
+    except ValueError:
+        raise BadRequestException(message=f'count must be one of {", ".join(m.value for m in CountMode)}')
+
+
+def offset_paginate(query: Query, page: int, per_page: int, count_mode: CountMode, guard_cost: bool = False,
+                    fetch: Callable = Query.all) -> tuple:
+    """
+    Paginate query with LIMIT/OFFSET, counting the total as requested by count_mode
+    With guard_cost the page query is rejected if the planner estimates it above QUERY_COST_LIMIT
+    fetch runs the page query, the models by default
+    Returns (items, number_of_pages, has_next), number_of_pages is None when counting is skipped
+    """
+    page = max(page, 1)
+    # fetch one extra row to know whether there is a next page without counting
+    page_query = query.limit(per_page + 1).offset((page - 1) * per_page)
+    if guard_cost:
+        check_cost(page_query)
+    items = fetch(page_query)
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    if count_mode is CountMode.NONE:
+        return items, None, has_next
+    if page == 1 and not has_next:
+        total = len(items)
+    elif count_mode is CountMode.ESTIMATE:
+        total = int(explain(query.order_by(None))['Plan Rows'])
+    else:
+        total = query.order_by(None).count()
+    return items, math.ceil(total / per_page), has_next
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor
+    """
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, columns: tuple) -> list:
+    """
+    Decode a cursor into sort key values typed after the given columns
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError()
+        return [datetime.fromisoformat(value) if column.type.python_type is datetime else
+                column.type.python_type(value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, binascii.Error, NotImplementedError):
+        raise BadRequestException(message='Invalid cursor')
+
+
+def get_sort_key(entity: Type, sort: str) -> tuple:
+    """
+    Get the keyset columns and direction for sort param, e.g. -created_at
+    The entity id is always appended as tie breaker so the key is unique
+    """
+    descending = sort.startswith('-')
+    name = sort.lstrip('-')
+    if name not in entity.__sortable__:
+        raise BadRequestException(message=f'{entity.__tablename__} cannot be sorted by {name}')
+    key = (entity.id,) if name == 'id' else (getattr(entity, name), entity.id)
+    return key, descending
+
+
+def keyset_paginate(query: Query, entity: Type, sort: str, cursor: str, per_page: int,
+                    guard_cost: bool = False, fetch: Callable = Query.all) -> tuple:
+    """
+    Paginate query by seeking past the cursor instead of using OFFSET,
+    so every page costs the same regardless of its depth
+    With guard_cost the page query is rejected if the planner estimates it above QUERY_COST_LIMIT
+    fetch runs the page query, the models by default, its rows must have the sort key columns
+    Returns (items, next_cursor), next_cursor is None on the last page
+    """
+    key, descending = get_sort_key(entity, sort)
+    if cursor:
+        values = decode_cursor(cursor, key)
+        if descending:
+            query = query.filter(tuple_(*key) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*key) > tuple_(*values))
+    # the sort key of the last row is needed for the cursor even when the fields param deferred it
+    query = query.options(*[undefer(column) for column in key])
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in key])
+
+    # fetch one extra row to know whether there is a next page
+    query = query.limit(per_page + 1)
+    if guard_cost:
+        check_cost(query)
+    items = fetch(query)
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in key])
+    return items, next_cursor
@@ -0,0 +1,72 @@
+import time
+from threading import Lock
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, NullPool
+
+
+class MeteredPoolMixin:
+    """
+    Records checkouts of a pool and how long they waited for a connection, including opening new ones.
+    Counters are per pool, so per engine and worker process, and restart when the pool is recreated
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = Lock()
+        self.checkouts = 0
+        self.checked_out = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        wait_time = time.perf_counter() - start
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+        return connection
+
+    def _do_return_conn(self, conn):
+        with self._metrics_lock:
+            self.checked_out -= 1
+        super()._do_return_conn(conn)
+
+    def stats(self) -> dict:
+        """
+        Get connection counts and checkout wait times of the pool, times in milliseconds
+        """
+        return {'pool': type(self).__name__,
+                'checked_out': self.checked_out,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_time_avg': self.wait_time / self.checkouts * 1000 if self.checkouts else None,
+                'wait_time_max': self.max_wait_time * 1000}
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    """
+    QueuePool with checkout metrics
+    """
+
+    def stats(self) -> dict:
+        return {**super().stats(),
+                'size': self.size(),
+                'idle': self.checkedin(),
+                'overflow': max(self.overflow(), 0),
+                'max_overflow': self._max_overflow}
+
+
+class MeteredNullPool(MeteredPoolMixin, NullPool):
+    """
+    NullPool with checkout metrics, for when PgBouncer does the pooling
+    """
@@ -0,0 +1,55 @@
+from flask import current_app, request, has_request_context
+from sqlalchemy import event, text
+from sqlalchemy.orm import Query, Session
+
+from ....api.common.utils.exceptions import BadRequestException
+from ....api.common.utils.helpers import explain
+
+# statement timeout in milliseconds capping the one of the endpoint, set on the sub-requests of a batch
+STATEMENT_TIMEOUT_CAP = 'project.statement_timeout_cap'
+
+
+class QueryGuard:
+    """
+    Bounds the database work a request can cause.
+    Every transaction begun while serving a request gets the statement timeout of its endpoint,
+    STATEMENT_TIMEOUTS[endpoint] or STATEMENT_TIMEOUT, set with SET LOCAL semantics so it ends with the transaction
+    and never leaks to other users of the pooled connection.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        event.listen(Session, 'after_begin', self._set_statement_timeout)
+
+    @staticmethod
+    def get_statement_timeout() -> int:
+        """
+        Get statement timeout in milliseconds of the endpoint serving the request, 0 means no timeout
+        """
+        timeout = current_app.config.get('STATEMENT_TIMEOUTS').get(request.endpoint,
+                                                                    current_app.config.get('STATEMENT_TIMEOUT'))
+        cap = request.environ.get(STATEMENT_TIMEOUT_CAP)
+        if cap is not None:
+            timeout = min(timeout, cap) if timeout else cap
+        return timeout
+
+    def _set_statement_timeout(self, session, transaction, connection):
+        if not has_request_context():
+            return
+        connection.execute(text("SELECT set_config('statement_timeout', :timeout, true)"),
+                           timeout=str(self.get_statement_timeout()))
+
+
+def check_cost(query: Query):
+    """
+    Reject query with a 400 before running it when the planner estimates it above QUERY_COST_LIMIT
+    """
+    limit = current_app.config.get('QUERY_COST_LIMIT')
+    if limit is None:
+        return
+    cost = explain(query)['Total Cost']
+    if cost > limit:
+        raise BadRequestException(message=f'Query is too expensive ({cost:.0f} > {limit}), narrow down the filter')
@@ -0,0 +1,143 @@
+import random
+import time
+
+from flask import current_app, request, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, exc, orm, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+from ....api.common.utils.cache import TTLCache
+
+# per request routing state, kept in the WSGI environ because the app context can outlive a request
+READ_BIND = 'project.read_bind'
+READ_PRIMARY = 'project.read_primary'
+WROTE = 'project.wrote'
+READ_PRIMARY_COOKIE = 'read_primary_until'
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+READ_ONLY_TEXT = ('SELECT', 'EXPLAIN', 'SHOW')
+
+
+class RoutingSession(SignallingSession):
+    """
+    Session reading from a replica while serving read only requests, see ReplicaRouter
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing and not isinstance(clause, UpdateBase) and not (
+                isinstance(clause, TextClause) and not clause.text.lstrip().upper().startswith(READ_ONLY_TEXT)):
+            bind = self.app.extensions['replica_router'].get_read_bind()
+            if bind is not None:
+                return self.app.extensions['sqlalchemy'].db.get_engine(self.app, bind=bind)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    SQLAlchemy extension whose sessions route reads to replicas
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class ReplicaRouter:
+    """
+    Picks the replica the reads of a request go to.
+    GET, HEAD and OPTIONS requests read from one of the REPLICA_BINDS (SQLALCHEMY_BINDS keys), everything else,
+    requests of a client that wrote in the last REPLICA_READ_YOUR_WRITES seconds and reads following a write
+    in the same request use the primary. Replicas lagging more than REPLICA_MAX_LAG seconds are skipped,
+    the lag of each replica is checked at most every REPLICA_LAG_CHECK_INTERVAL seconds per process.
+    Recent writers are remembered per process by their Authorization header and across processes
+    by a cookie, clients that drop cookies may read their own writes late when served by another worker.
+    """
+
+    def __init__(self, app=None):
+        self.lags = {}
+        self.recent_writers = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['replica_router'] = self
+        self.recent_writers = TTLCache(app.config.get('REPLICA_RECENT_WRITERS_SIZE'),
+                                       app.config.get('REPLICA_READ_YOUR_WRITES'))
+        event.listen(Session, 'after_flush', self._record_write)
+        app.after_request(self._set_read_primary_cookie)
+
+    def get_read_bind(self):
+        """
+        Get the replica bind the reads of the current request go to, None for the primary
+        """
+        if not has_request_context() or request.environ.get(READ_PRIMARY):
+            return None
+        if READ_BIND not in request.environ:
+            request.environ[READ_BIND] = self._choose_replica()
+        return request.environ[READ_BIND]
+
+    @staticmethod
+    def use_primary():
+        """
+        Send the remaining reads of the current request to the primary
+        """
+        request.environ[READ_PRIMARY] = True
+
+    def get_lag(self, bind: str) -> float:
+        """
+        Get replication lag of replica in seconds, infinite when it cannot be reached or is unknown
+        """
+        checked_at, lag = self.lags.get(bind, (None, None))
+        if checked_at is not None and time.monotonic() - checked_at < current_app.config.get('REPLICA_LAG_CHECK_INTERVAL'):
+            return lag
+        try:
+            with current_app.extensions['sqlalchemy'].db.get_engine(current_app, bind=bind).connect() as connection:
+                # a replica that replayed everything it received is up to date, however old its last transaction is
+                lag = connection.execute(text(
+                    'SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+                    'THEN 0 ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END')).scalar()
+            # the lag is unknown (NULL) until a replica replayed a transaction, its reads go to the primary meanwhile
+            lag = float('inf') if lag is None else float(lag)
+        except exc.SQLAlchemyError:
+            current_app.logger.warning(f'replica {bind} is unreachable')
+            lag = float('inf')
+        self.lags[bind] = (time.monotonic(), lag)
+        return lag
+
+    def _choose_replica(self):
+        if request.method not in READ_ONLY_METHODS or self._wrote_recently():
+            return None
+        max_lag = current_app.config.get('REPLICA_MAX_LAG')
+        replicas = [bind for bind in current_app.config.get('REPLICA_BINDS') if self.get_lag(bind) <= max_lag]
+        return random.choice(replicas) if replicas else None
+
+    def _wrote_recently(self) -> bool:
+        if request.cookies.get(READ_PRIMARY_COOKIE, 0, type=float) > time.time():
+            return True
+        return self.recent_writers.get(self._client_key()) is not None
+
+    @staticmethod
+    def _client_key() -> str:
+        return request.headers.get('Authorization') or request.remote_addr
+
+    def _record_write(self, session, flush_context):
+        if has_request_context():
+            self.record_write()
+
+    def record_write(self):
+        """
+        Send the reads of the current request and of its client for the read your writes window to the primary,
+        called on flush and by writes that bypass the unit of work, e.g. bulk statements
+        """
+        self.use_primary()
+        request.environ[WROTE] = True
+        self.recent_writers.set(self._client_key(), True)
+
+    @staticmethod
+    def _set_read_primary_cookie(response):
+        if request.environ.get(WROTE):
+            until = time.time() + current_app.config.get('REPLICA_READ_YOUR_WRITES')
+            response.set_cookie(READ_PRIMARY_COOKIE, str(until), max_age=current_app.config.get('REPLICA_READ_YOUR_WRITES'),
+                                httponly=True)
+        return response
@@ -0,0 +1,76 @@
+import re
+from typing import Type
+
+from flask import request
+from sqlalchemy import func, literal_column, or_
+from sqlalchemy.orm import Query
+
+from ....api.common.utils.exceptions import BadRequestException
+
+# Text search configuration of the search vectors, simple does no stemming which suits names and emails
+SEARCH_CONFIG = literal_column("'simple'")
+
+
+def get_search_text() -> str:
+    """
+    Get search text from the q param of request
+    """
+    return request.args.get('q', default='', type=str).strip()
+
+
+def to_prefix_tsquery(text: str) -> str:
+    """
+    Convert search text to a tsquery matching rows that contain every word, words match as prefixes
+    e.g. 'jo smi' becomes 'jo:* & smi:*'
+    """
+    return ' & '.join(f'{word}:*' for word in re.findall(r'\w+', text))
+
+
+def get_search_vector(entity: Type):
+    """
+    Get the tsvector column entity is searched on
+    """
+    if entity.__searchable__ is None:
+        raise BadRequestException(message=f'{entity.__tablename__} does not support search')
+    return getattr(entity, entity.__searchable__)
+
+
+def search_condition(entity: Type, text: str):
+    """
+    Get criterion matching entity rows to search text, None if text has no words
+    """
+    tsquery = to_prefix_tsquery(text)
+    if not tsquery:
+        return None
+    return get_search_vector(entity).op('@@')(func.to_tsquery(SEARCH_CONFIG, tsquery))
+
+
+def search_order(entity: Type, text: str) -> tuple:
+    """
+    Get order by clauses ranking entity rows by relevance to search text, empty if text has no words
+    """
+    tsquery = to_prefix_tsquery(text)
+    if not tsquery:
+        return ()
+    return func.ts_rank(get_search_vector(entity), func.to_tsquery(SEARCH_CONFIG, tsquery)).desc(),
+
+
+def escape_like(text: str, escape: str = '/') -> str:
+    """
+    Escape LIKE wildcards in text so it is matched literally
+    """
+    return text.replace(escape, escape * 2).replace('%', f'{escape}%').replace('_', f'{escape}_')
+
+
+def autocomplete_query(query: Query, entity: Type, text: str) -> Query:
+    """
+    Filter query to entity rows whose __autocomplete__ columns start with text or are similar to it,
+    most similar first. Both the ILIKE prefix and the pg_trgm % similarity operator are served by trigram indexes
+    """
+    columns = [getattr(entity, name) for name in entity.__autocomplete__]
+    pattern = f'{escape_like(text)}%'
+    # % is doubled for the psycopg2 paramstyle
+    criteria = [*(column.ilike(pattern, escape='/') for column in columns),
+                *(column.op('%%')(text) for column in columns)]
+    similarity = func.greatest(*(func.similarity(column, text) for column in columns))
+    return query.filter(or_(*criteria)).order_by(similarity.desc(), entity.id)
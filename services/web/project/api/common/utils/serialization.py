@@ -0,0 +1,180 @@
+"""
+JSON serialization backends, the app serializes responses with the one named by JSON_BACKEND
+
+    json    the stdlib json module with the app's json_encoder, the output of flask.jsonify except that non string
+            keys are converted to strings before the keys are sorted, as orjson does
+    orjson  orjson, serializes datetimes, enums and UUIDs natively straight to bytes and falls back
+            to the app's json_encoder for other values, e.g. sets. Compact output is the same bytes,
+            except that non ASCII characters are sent as UTF-8 rather than escaped
+
+Compare them with `python manage.py benchmark_json`.
+
+Clients may prefer a binary encoding with the Accept header, responses are then sent in it and request bodies
+may be sent in it too with the Content-Type header, see BaseRequest
+
+    application/msgpack  MessagePack, datetimes are isoformat strings as in JSON
+    application/cbor     CBOR, datetimes are tagged date/time strings with the local UTC offset
+
+Views use jsonify of this module, a drop-in replacement of flask.jsonify that encodes with the negotiated media type,
+and are decorated with accept(*MEDIA_TYPES).
+"""
+from datetime import datetime
+from uuid import uuid4
+
+from flask import current_app, has_request_context, json, request
+
+try:
+    import msgpack
+except ImportError:  # binary encodings are offered when their package is installed
+    msgpack = None
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+JSON_MIMETYPE = 'application/json'
+
+
+def str_keys(obj):
+    """
+    Copy of obj whose dict keys are all strings, converted as orjson's OPT_NON_STR_KEYS does, so that keys of mixed
+    types can be sorted and sort the same way in every backend
+    """
+    if isinstance(obj, dict):
+        return {key if isinstance(key, str) else str_key(key): str_keys(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [str_keys(value) for value in obj]
+    return obj
+
+
+def str_key(key) -> str:
+    """
+    String form of a non string dict key, its JSON value without the quotes if it is serialized to a string
+    """
+    value = json.dumps(key)
+    return json.loads(value) if value.startswith('"') else value
+
+
+class StdlibJSONBackend:
+    """
+    Serializes with the stdlib json module and the app's json_encoder
+    """
+
+    def dumps(self, obj, pretty: bool = False) -> bytes:
+        if current_app.config.get('JSON_SORT_KEYS'):
+            obj = str_keys(obj)
+        if pretty:
+            return json.dumps(obj, indent=2, separators=(', ', ': ')).encode()
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+
+class OrjsonJSONBackend:
+    """
+    Serializes with orjson
+    """
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+
+    def dumps(self, obj, pretty: bool = False) -> bytes:
+        option = self.orjson.OPT_NON_STR_KEYS
+        if current_app.config.get('JSON_SORT_KEYS'):
+            option |= self.orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= self.orjson.OPT_INDENT_2
+        return self.orjson.dumps(obj, default=current_app.json_encoder().default, option=option)
+
+
+JSON_BACKENDS = {'json': StdlibJSONBackend, 'orjson': OrjsonJSONBackend}
+
+
+class MsgpackEncoding:
+    """
+    Encodes with MessagePack, values it has no type for are converted by the app's json_encoder
+    """
+
+    def dumps(self, obj) -> bytes:
+        return msgpack.packb(obj, default=current_app.json_encoder().default)
+
+    def loads(self, data: bytes):
+        return msgpack.unpackb(data)
+
+
+class CBOREncoding:
+    """
+    Encodes with CBOR, the naive local datetimes of the database are sent with the local UTC offset
+    and values it has no type for are converted by the app's json_encoder
+    """
+
+    def dumps(self, obj) -> bytes:
+        default = current_app.json_encoder().default
+        return cbor2.dumps(obj, timezone=datetime.now().astimezone().tzinfo,
+                           default=lambda encoder, value: encoder.encode(default(value)))
+
+    def loads(self, data: bytes):
+        return cbor2.loads(data)
+
+
+BINARY_ENCODINGS = {mimetype: encoding() for mimetype, encoding, module in
+                    (('application/msgpack', MsgpackEncoding, msgpack), ('application/cbor', CBOREncoding, cbor2))
+                    if module is not None}
+# media types of responses and request bodies, JSON is preferred when the client accepts several equally
+MEDIA_TYPES = (JSON_MIMETYPE, *BINARY_ENCODINGS)
+
+
+def get_media_type() -> str:
+    """
+    Get the media type of the response to the current request, JSON outside of requests
+    """
+    if not has_request_context():
+        return JSON_MIMETYPE
+    return request.accept_mimetypes.best_match(MEDIA_TYPES, default=JSON_MIMETYPE)
+
+
+def dumps(obj) -> bytes:
+    """
+    Serialize obj with the JSON backend of the app
+    """
+    return current_app.json_backend.dumps(obj)
+
+
+def dumps_with_raw(obj: dict, key: str, raw: bytes) -> bytes:
+    """
+    Serialize obj like jsonify, with JSON bytes rendered elsewhere, e.g. by the database, as the value of key
+    """
+    placeholder = f'raw-{uuid4().hex}'
+    pretty = current_app.config.get('JSONIFY_PRETTYPRINT_REGULAR') or current_app.debug
+    data = current_app.json_backend.dumps({**obj, key: placeholder}, pretty=pretty)
+    return data.replace(f'"{placeholder}"'.encode(), raw, 1) + b'\n'
+
+
+def json_response(result):
+    """
+    Get the response of a result, JSON bytes, only rendered when JSON is negotiated, are sent as they are
+    and other values are serialized with jsonify
+    """
+    if isinstance(result, bytes):
+        response = current_app.response_class(result, mimetype=current_app.config.get('JSONIFY_MIMETYPE'))
+        response.vary.add('Accept')
+        return response
+    return jsonify(result)
+
+
+def jsonify(*args, **kwargs):
+    """
+    flask.jsonify serializing with the JSON backend of the app, or with the binary encoding the client prefers
+    """
+    if args and kwargs:
+        raise TypeError('jsonify() behavior undefined when passed both args and kwargs')
+    data = args[0] if len(args) == 1 else args or kwargs
+    media_type = get_media_type()
+    if media_type in BINARY_ENCODINGS:
+        response = current_app.response_class(BINARY_ENCODINGS[media_type].dumps(data), mimetype=media_type)
+    else:
+        pretty = current_app.config.get('JSONIFY_PRETTYPRINT_REGULAR') or current_app.debug
+        response = current_app.response_class(current_app.json_backend.dumps(data, pretty=pretty) + b'\n',
+                                              mimetype=current_app.config.get('JSONIFY_MIMETYPE'))
+    if has_request_context():
+        response.vary.add('Accept')
+    return response
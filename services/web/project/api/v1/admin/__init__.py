@@ -1,6 +1,8 @@
 from .users import users_blueprint
+from .metrics import metrics_blueprint
+from .stats import stats_blueprint
 
 """
 Add your admin blueprints here
 """
-admin_blueprints = [users_blueprint]
+admin_blueprints = [users_blueprint, metrics_blueprint, stats_blueprint]
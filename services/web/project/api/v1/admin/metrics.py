@@ -0,0 +1,33 @@
+import os
+from flask import Blueprint, current_app
+from flask_accept import accept
+
+from .... import db, result_cache, fragment_cache, principal_cache
+from ....models.user import UserRole
+from ...common.utils.decorators import privileges
+from ...common.utils.serialization import jsonify, MEDIA_TYPES
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+
+@metrics_blueprint.route('/metrics/cache', methods=['GET'])
+@accept(*MEDIA_TYPES)
+@privileges(role=UserRole.ADMIN)
+def get_cache_metrics(_):
+    """
+    Get hit/miss counters of the result, fragment and principal caches of the worker serving the request
+    """
+    return jsonify(result_cache=result_cache.stats(), fragment_cache=fragment_cache.stats(),
+                   principal_cache=principal_cache.stats())
+
+
+@metrics_blueprint.route('/metrics/pool', methods=['GET'])
+@accept(*MEDIA_TYPES)
+@privileges(role=UserRole.ADMIN)
+def get_pool_metrics(_):
+    """
+    Get connection pool statistics of every engine of the worker serving the request
+    """
+    binds = [None, *current_app.config.get('SQLALCHEMY_BINDS')]
+    return jsonify(pid=os.getpid(),
+                   pools={bind or 'primary': db.get_engine(current_app, bind=bind).pool.stats() for bind in binds})
@@ -0,0 +1,25 @@
+from flask import Blueprint, request, current_app
+from flask_accept import accept
+
+from ....models.user import UserRole
+from ....models.user_stats import UserStat, UserSignupDay
+from ...common.utils.decorators import privileges
+from ...common.utils.serialization import jsonify, MEDIA_TYPES
+
+stats_blueprint = Blueprint('stats', __name__)
+
+
+@stats_blueprint.route('/stats/users', methods=['GET'])
+@accept(*MEDIA_TYPES)
+@privileges(role=UserRole.ADMIN)
+def get_user_stats(_):
+    """
+    Get user counts by role, active and social_type and signups per day for the last days param,
+    read from the rollups maintained on every user write instead of scanning users
+    """
+    days = request.args.get('days', current_app.config.get('USER_STATS_DAYS'), type=int)
+    days = min(max(days, 1), current_app.config.get('USER_STATS_MAX_DAYS'))
+    dimensions = UserStat.dimensions()
+    return jsonify(total=sum(stat['count'] for stat in dimensions['role']),
+                   **dimensions,
+                   signups=[signup.json() for signup in UserSignupDay.last_days(days)])
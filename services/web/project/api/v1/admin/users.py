@@ -5,29 +5,65 @@ from flask_accept import accept
 from ..base import BaseAPI
 from ....models.user import User, UserRole
 from ...common.utils.helpers import register_api
+from ...common.utils.export import EXPORT_FORMATS
+from ...common.utils.serialization import MEDIA_TYPES
+from ...common.utils.bulk import hash_passwords
 from ...common.utils.decorators import privileges
-from ..validations.admin.users import UsersPost, UsersPut
+from ..validations.admin.users import UsersPost, UsersPut, UsersBulkPost, UsersBulkPatch
 
 users_blueprint = Blueprint('users', __name__)
 
 
 class UsersAPI(BaseAPI, MethodView):
-    decorators = [accept('application/json'), privileges(role=UserRole.ADMIN)]
+    decorators = [accept(*MEDIA_TYPES), privileges(role=UserRole.ADMIN)]
 
     def post(self, logged_in_user_id: int, **kwargs):
         return super().post(logged_in_user_id, UsersPost, User)
 
     def get(self, logged_in_user_id: int, user_id: int = None, **kwargs):
         if user_id is None:
-            return super().get(logged_in_user_id, User)
+            return super().get(logged_in_user_id, User, db_json=True)
         else:
             return super().get_by_id(logged_in_user_id, user_id, User)
 
     def put(self, logged_in_user_id: int, user_id: int, **kwargs):
         return super().put(logged_in_user_id, user_id, UsersPut, User)
 
-    def delete(self, logged_in_user_id: int, user_id: int, **kwargs):
-        return super().delete(logged_in_user_id, user_id, User)
+    def patch(self, logged_in_user_id: int, **kwargs):
+        return super().bulk_patch(logged_in_user_id, UsersBulkPatch, User)
+
+    def delete(self, logged_in_user_id: int, user_id: int = None, **kwargs):
+        if user_id is None:
+            return super().bulk_delete(logged_in_user_id, User)
+        else:
+            return super().delete(logged_in_user_id, user_id, User)
+
+
+class UsersBulkAPI(BaseAPI, MethodView):
+    decorators = [accept(*MEDIA_TYPES), privileges(role=UserRole.ADMIN)]
+
+    def post(self, logged_in_user_id: int, **kwargs):
+        return super().bulk_post(logged_in_user_id, UsersBulkPost, User, prepare=self.hash_passwords)
+
+    @staticmethod
+    def hash_passwords(rows: list) -> list:
+        for row, password in zip(rows, hash_passwords([row['password'] for row in rows])):
+            row['password'] = password
+        return rows
+
+
+class UsersAutocompleteAPI(BaseAPI, MethodView):
+    decorators = [accept(*MEDIA_TYPES), privileges(role=UserRole.ADMIN)]
+
+    def get(self, logged_in_user_id: int, **kwargs):
+        return super().autocomplete(logged_in_user_id, User)
+
+
+class UsersExportAPI(BaseAPI, MethodView):
+    decorators = [accept(*EXPORT_FORMATS), privileges(role=UserRole.ADMIN)]
+
+    def get(self, logged_in_user_id: int, **kwargs):
+        return super().export(logged_in_user_id, User)
 
 
 register_api(blueprint=users_blueprint,
@@ -35,3 +71,7 @@ register_api(blueprint=users_blueprint,
              endpoint='users_api',
              url='/users/',
              pk='user_id')
+users_blueprint.add_url_rule('/users/bulk', view_func=UsersBulkAPI.as_view('users_bulk_api'), methods=['POST'])
+users_blueprint.add_url_rule('/users/autocomplete', view_func=UsersAutocompleteAPI.as_view('users_autocomplete_api'),
+                             methods=['GET'])
+users_blueprint.add_url_rule('/users/export', view_func=UsersExportAPI.as_view('users_export_api'), methods=['GET'])
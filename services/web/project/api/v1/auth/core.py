@@ -1,4 +1,4 @@
-from flask import request, current_app, jsonify, Blueprint
+from flask import request, current_app, Blueprint
 from flask_accept import accept
 from sqlalchemy import exc
 from pydantic import ValidationError
@@ -9,6 +9,7 @@ from ....api.common.utils.exceptions import InvalidPayloadException, NotFoundExc
 from ....api.common.utils.decorators import authenticate, privileges
 from ....models.user import User, UserRole
 from ....api.common.utils.helpers import session_scope
+from ....api.common.utils.serialization import jsonify, MEDIA_TYPES
 from ..validations.auth.core import UserRegister, UserLogin, PasswordChange, PasswordReset, PasswordRecovery
 
 
@@ -16,7 +17,7 @@ auth_core_blueprint = Blueprint('auth_core', __name__)
 
 
 @auth_core_blueprint.route('/auth/register', methods=['POST'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
 def register_user():
     """
     New user registration
@@ -54,7 +55,7 @@ def register_user():
 
 
 @auth_core_blueprint.route('/auth/login', methods=['POST'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
 def login_user():
     """
     User login
@@ -80,7 +81,7 @@ def login_user():
 
 
 @auth_core_blueprint.route('/auth/logout', methods=['GET'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
 @privileges(role=UserRole.USER | UserRole.ADMIN)
 def logout_user(_):
     """
@@ -90,7 +91,7 @@ def logout_user(_):
 
 
 @auth_core_blueprint.route('/auth/status', methods=['GET'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
 @authenticate
 def get_user_status(user_id: int):
     """
@@ -102,7 +103,7 @@ def get_user_status(user_id: int):
 
 
 @auth_core_blueprint.route('/auth/password_change', methods=['PUT'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
 @authenticate
 def password_change(user_id: int):
     """
@@ -125,7 +126,7 @@ def password_change(user_id: int):
 
 
 @auth_core_blueprint.route('/auth/password_reset', methods=['PUT'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
 def password_reset():
     """
     Reset user password
@@ -148,7 +149,7 @@ def password_reset():
 
 
 @auth_core_blueprint.route('/auth/password_recovery', methods=['POST'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
 def password_recovery():
     """
     Creates a password_recovery_hash and sends email to user
@@ -1,18 +1,20 @@
 from datetime import datetime
-from flask import current_app, jsonify, Blueprint
+from flask import current_app, Blueprint
 from flask_accept import accept
 
 from .... import db, bcrypt
 from ....api.common.utils.exceptions import NotFoundException, InvalidPayloadException
-from ....api.common.utils.decorators import authenticate
+from ....api.common.utils.decorators import authenticate, read_primary
 from ....models.user import User
 from ....api.common.utils.helpers import session_scope
+from ....api.common.utils.serialization import jsonify, MEDIA_TYPES
 
 email_verification_blueprint = Blueprint('email_verification', __name__)
 
 
 @email_verification_blueprint.route('/email_verification/', methods=['GET'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
+@read_primary
 @authenticate
 def email_verification(user_id: int):
     """
@@ -31,6 +33,7 @@ def email_verification(user_id: int):
 
 
 @email_verification_blueprint.route('/email_verification/<token>', methods=['GET'])
+@read_primary
 def verify_email(token):
     """
     Verifies email with given token
@@ -53,7 +56,8 @@ def verify_email(token):
 
 
 @email_verification_blueprint.route('/email_verification/resend', methods=['GET'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
+@read_primary
 @authenticate
 def resend_verification(user_id: int):
     """
@@ -1,4 +1,4 @@
-from flask import request, current_app, redirect, jsonify, make_response, Blueprint
+from flask import request, current_app, redirect, make_response, Blueprint
 from sqlalchemy import and_
 from flask_accept import accept
 import requests
@@ -7,8 +7,9 @@ import json
 from .... import bcrypt, db
 from ....models.user import User, SocialAuth
 from ....api.common.utils.helpers import session_scope
+from ....api.common.utils.serialization import jsonify, MEDIA_TYPES
 from ....api.common.utils.exceptions import BadRequestException, InvalidPayloadException, NotFoundException
-from ....api.common.utils.decorators import authenticate
+from ....api.common.utils.decorators import authenticate, read_primary
 from uuid import uuid4
 
 auth_social_blueprint = Blueprint('auth_social', __name__)
@@ -29,6 +30,7 @@ def github_login():
 
 
 @auth_social_blueprint.route('/auth/github/login/callback', methods=['GET'])
+@read_primary
 def github_login_callback():
     """
     Get access token with code and return the corresponding JWT
@@ -99,6 +101,7 @@ def facebook_login():
 
 
 @auth_social_blueprint.route('/auth/facebook/login/callback', methods=['GET'])
+@read_primary
 def facebook_login_callback():
     """
     Get access token with code and return the corresponding JWT
@@ -182,7 +185,7 @@ def add_user_into_db(email: str, name: str, username: str, social_id: str, acces
 
 # TODO Review
 @auth_social_blueprint.route('/auth/social/set_standalone_user', methods=['PUT'])
-@accept('application/json')
+@accept(*MEDIA_TYPES)
 @authenticate
 def set_standalone_user(user_id: int):
     """
@@ -1,13 +1,23 @@
-from flask import request, current_app, jsonify
-from sqlalchemy import exc, text
+from flask import request, current_app, stream_with_context
+from sqlalchemy import exc, and_, update, delete
+from sqlalchemy.orm import Query
 from pydantic import BaseModel, ValidationError
-from typing import Type
+from typing import Type, Callable
 
 from ...models.base import Base
-from ... import db
+from ... import db, result_cache, fragment_cache, principal_cache, replica_router
 from ..common.utils.exceptions import NotFoundException, InvalidPayloadException, BadRequestException, \
-    ValidationException
-from ..common.utils.helpers import get_query_from_text, session_scope
+    ValidationException, StatementTimeoutException
+from ..common.utils.helpers import get_query_from_text, session_scope, get_fields, load_fields, is_statement_timeout
+from ..common.utils.filters import get_filtered_query, get_filter_key, parse_order_by, has_request_criteria
+from ..common.utils.conditional import make_etag, is_not_modified, not_modified, set_validators
+from ..common.utils.export import EXPORT_FORMATS, CSV_MIMETYPE, NDJSON_MIMETYPE, csv_lines, ndjson_lines
+from ..common.utils.search import get_search_text, search_order, autocomplete_query
+from ..common.utils.serialization import jsonify, json_response, dumps_with_raw, get_media_type, JSON_MIMETYPE
+from ..common.utils.db_json import row_json, json_rows, join_rows, key_rows, render_rows
+from ..common.utils.pagination import keyset_paginate, offset_paginate, get_per_page, get_count_mode
+from ..common.utils.bulk import read_payloads, row_error, find_conflicts, insert_rows, column_values, get_ids, \
+    get_bulk_criteria, id_results
 
 
 class BaseAPI:
@@ -33,26 +43,105 @@ class BaseAPI:
             db.session.rollback()
             raise InvalidPayloadException()
 
+    def bulk_post(self, logged_in_user_id: int,
+                  validator: Type[BaseModel],
+                  entity: Type[Base],
+                  prepare: Callable = None):
+        """
+        Bulk POST call, adds the entities of a JSON array or NDJSON body and reports the result of every row
+        Unique columns are checked for the whole batch in one query and rows are inserted in chunks,
+        prepare can transform the list of valid rows before they are inserted, e.g. to hash passwords
+        """
+        results, rows = {}, {}
+        for index, payload in enumerate(read_payloads()):
+            try:
+                if not isinstance(payload, dict):
+                    raise ValueError()
+                rows[index] = validator(logged_in_user_id=logged_in_user_id, **payload).dict()
+            except ValidationError as e:
+                results[index] = row_error(index, ValidationException(e).payload['errors'])
+            except ValueError:
+                results[index] = row_error(index, [{'field': None, 'message': 'expected a JSON object'}])
+        if not results and not rows:
+            raise InvalidPayloadException()
+
+        for index, errors in find_conflicts(entity, rows).items():
+            results[index] = row_error(index, errors)
+            del rows[index]
+        ids = {}
+        if rows:
+            if prepare is not None:
+                rows = dict(zip(rows, prepare(list(rows.values()))))
+            with session_scope(db.session) as session:
+                ids = insert_rows(session, entity, rows)
+                # the rows are inserted without the unit of work, whose events track writes
+                result_cache.mark_written(session, entity.__tablename__)
+                replica_router.record_write()
+        for index in rows:
+            results[index] = {'index': index, 'code': 201, 'id': ids[index]} if index in ids else \
+                row_error(index, [{'field': None, 'message': f'{entity.__tablename__} already exists'}])
+
+        results = [results[index] for index in sorted(results)]
+        return jsonify(added=len(ids), failed=len(results) - len(ids), results=results), \
+            201 if len(ids) == len(results) else 207
+
     def get_by_id(self, logged_in_user_id: int,
                   id_: int,
                   entity: Type[Base],
                   json_func: str = 'json'):
         """Standard GET by Id call"""
-        model = entity.get(id_)
-        if not model:
-            raise NotFoundException(message=f'{entity.__tablename__} does not exist')
-        return jsonify(getattr(model, json_func)())
+        fields = get_fields(entity)
+        variant = (json_func, fields and tuple(fields))
+        # representations of every media type are cached apart, each has its own ETag
+        key = result_cache.key(entity, 'id', id_, get_media_type(), *variant)
+        cached = result_cache.get(key)
+        if cached is None:
+            # only updated_at is read to answer a conditional request, the entity is loaded if it was modified
+            if request.if_none_match or request.if_modified_since:
+                updated_at = db.session.query(entity.updated_at).filter(entity.id == id_).scalar()
+                if updated_at is None:
+                    raise NotFoundException(message=f'{entity.__tablename__} does not exist')
+                etag = make_etag(entity.__tablename__, id_, updated_at, *variant)
+                if is_not_modified(etag, updated_at):
+                    return not_modified(etag, updated_at)
+
+            model = load_fields(entity.query, entity, fields).get(id_)
+            if not model:
+                raise NotFoundException(message=f'{entity.__tablename__} does not exist')
+            result = entity.serializer(fields, json_func)(model)
+            cached = (make_etag(entity.__tablename__, id_, model.updated_at, *variant), model.updated_at, result)
+            result_cache.set(key, cached)
+
+        etag, updated_at, result = cached
+        if is_not_modified(etag, updated_at):
+            return not_modified(etag, updated_at)
+        return set_validators(jsonify(result), etag, updated_at)
 
     def get(self, logged_in_user_id: int,
             entity: Type[Base],
             json_func: str = 'json',
-            custom_filter=None):
-        """Standard GET call"""
+            custom_filter=None,
+            db_json: bool = False):
+        """
+        Standard GET call
+        With db_json the rows of the page are rendered as JSON by the database when the fields allow it
+        """
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', current_app.config.get('POSTS_PER_PAGE'), type=int)
+        per_page = get_per_page()
+        fields = get_fields(entity)
+        count_mode = get_count_mode()
+
+        key = result_cache.key(entity, 'list', get_media_type(), json_func, fields and tuple(fields),
+                               get_filter_key(custom_filter), page, per_page, count_mode, request.args.get('cursor'),
+                               request.args.get('sort'))
+        cached = result_cache.get(key)
+        if cached is not None:
+            etag, result = cached
+            if is_not_modified(etag):
+                return not_modified(etag)
+            return set_validators(json_response(result), etag)
 
-        query = get_query_from_text('filter')
-        order_by = get_query_from_text('order_by')
+        order_by = parse_order_by(entity, get_query_from_text('order_by'))
 
         try:
             """
@@ -60,21 +149,121 @@ class BaseAPI:
             An example is a normal user querying and only active entities should be returned,
             custom filter limits the result to only active entities
             """
-            if custom_filter is not None:
-                models = entity.query.order_by(text(order_by), entity.created_at.desc()).filter(text(query),
-                                                                                                custom_filter)
+            models = get_filtered_query(entity, fields, custom_filter)
+            # queries shaped by the client are checked against the cost limit before they run
+            guard_cost = has_request_criteria()
+            # rows rendered by the database stand in for the models, they have the id, updated_at and sort keys
+            as_json = get_media_type() == JSON_MIMETYPE and entity.compiles(fields, json_func)
+            expression = row_json(entity, fields) if db_json and as_json else None
+            if expression is None:
+                fetch = Query.all
+            elif fragment_cache.enabled:
+                # only the keys of the rows are read, the ones missing from the fragment cache are rendered after
+                fetch = key_rows(entity)
             else:
-                models = entity.query.order_by(text(order_by), entity.created_at.desc()).filter(text(query))
+                fetch = json_rows(entity, expression)
 
-            models = models.paginate(page, per_page, False, max_per_page=current_app.config.get('MAX_PER_PAGE'))
+            """
+            Cursor mode seeks past the last row of the previous page on a whitelisted sort key,
+            so deep pages cost the same as the first one. It is enabled by passing the cursor param,
+            empty for the first page and then the next_cursor of the previous response
+            """
+            if 'cursor' in request.args:
+                # the keyset follows the sort param only, orders it cannot follow are rejected rather than ignored
+                if order_by:
+                    raise BadRequestException(message='order_by cannot be used with cursor, use sort')
+                if 'sort' not in request.args and search_order(entity, get_search_text()):
+                    raise BadRequestException(message='Search results cannot be ranked with cursor, use sort')
+                items, next_cursor = keyset_paginate(models, entity,
+                                                     sort=request.args.get('sort', '-created_at', type=str),
+                                                     cursor=request.args.get('cursor', type=str),
+                                                     per_page=per_page,
+                                                     guard_cost=guard_cost,
+                                                     fetch=fetch)
+                pagination = {'per_page': per_page,
+                              'next_cursor': next_cursor}
+            else:
+                # search results are ranked by relevance unless the order is given explicitly
+                models = models.order_by(*order_by, *search_order(entity, get_search_text()), entity.created_at.desc())
+                items, number_of_pages, has_next = offset_paginate(models, page, per_page, count_mode, guard_cost,
+                                                                   fetch)
+                pagination = {'page': max(page, 1),
+                              'per_page': per_page,
+                              'number_of_pages': number_of_pages,
+                              'has_next': has_next,
+                              'count_mode': count_mode.value}
 
-            return jsonify({'page': models.page,
-                            'per_page': models.per_page,
-                            'number_of_pages': models.pages,
-                            f'{entity.__tablename__}s': [getattr(model, json_func)() for model in models.items]})
-        except exc.SQLAlchemyError:
+            # the page is identified by its pagination and the version of every row, checked before serializing
+            etag = make_etag(json_func, fields, pagination, [(model.id, model.updated_at) for model in items])
+            if is_not_modified(etag):
+                return not_modified(etag)
+
+            if expression is not None and fragment_cache.enabled:
+                # rows that did not change since they were last sent are spliced from the fragment cache
+                rows = fragment_cache.render((entity.__tablename__, fields and tuple(fields)), items,
+                                             lambda missing: render_rows(entity, expression, missing))
+                result = dumps_with_raw(pagination, f'{entity.__tablename__}s', rows)
+            elif expression is not None:
+                result = dumps_with_raw(pagination, f'{entity.__tablename__}s', join_rows(items))
+            else:
+                serialize = entity.serializer(fields, json_func)
+                result = {**pagination, f'{entity.__tablename__}s': [serialize(model) for model in items]}
+            result_cache.set(key, (etag, result))
+            return set_validators(json_response(result), etag)
+        except exc.SQLAlchemyError as e:
+            if is_statement_timeout(e):
+                raise StatementTimeoutException()
             raise BadRequestException()
 
+    def export(self, logged_in_user_id: int,
+               entity: Type[Base],
+               json_func: str = 'json',
+               custom_filter=None):
+        """Standard export call, streams every entity matching the GET filters as NDJSON or CSV"""
+        fields = get_fields(entity)
+        order_by = parse_order_by(entity, get_query_from_text('order_by'))
+        models = get_filtered_query(entity, fields, custom_filter).order_by(*order_by, entity.created_at.desc())
+        # rows are read through a server side cursor in chunks while the response is sent, keeping memory flat
+        models = models.yield_per(current_app.config.get('EXPORT_CHUNK_SIZE'))
+
+        mimetype = request.accept_mimetypes.best_match(EXPORT_FORMATS, default=NDJSON_MIMETYPE)
+        if mimetype == CSV_MIMETYPE:
+            # CSV needs the same columns on every row, so the full representation is every selectable field
+            fields = fields or list(entity.__selectable__)
+            lines = csv_lines(models, fields, entity.serializer(fields))
+        else:
+            lines = ndjson_lines(models, entity.serializer(fields, json_func))
+        response = current_app.response_class(stream_with_context(lines), mimetype=mimetype)
+        response.headers['Content-Disposition'] = \
+            f'attachment; filename={entity.__tablename__}s.{EXPORT_FORMATS[mimetype]}'
+        return response
+
+    def autocomplete(self, logged_in_user_id: int,
+                     entity: Type[Base],
+                     custom_filter=None):
+        """Standard autocomplete call, entities whose __autocomplete__ columns start with or resemble the q param"""
+        text = request.args.get('q', default='', type=str).strip()
+        limit = min(request.args.get('limit', current_app.config.get('AUTOCOMPLETE_LIMIT'), type=int),
+                    current_app.config.get('AUTOCOMPLETE_MAX_LIMIT'))
+        fields = get_fields(entity) or ['id', *entity.__autocomplete__]
+        if len(text) < current_app.config.get('AUTOCOMPLETE_MIN_LENGTH') or limit < 1:
+            return jsonify({f'{entity.__tablename__}s': []})
+
+        # hot prefixes are served from a short lived cache, the key changes whenever the entity is written
+        key = result_cache.key(entity, 'autocomplete', text.lower(), limit, tuple(fields), get_filter_key(custom_filter))
+        ttl = current_app.config.get('AUTOCOMPLETE_CACHE_TTL')
+        result = current_app.autocomplete_cache.get(key) if ttl > 0 else None
+        if result is None:
+            models = load_fields(entity.query, entity, fields)
+            if custom_filter is not None:
+                models = models.filter(custom_filter)
+            models = autocomplete_query(models, entity, text).limit(limit)
+            serialize = entity.serializer(fields)
+            result = {f'{entity.__tablename__}s': [serialize(model) for model in models]}
+            if ttl > 0:
+                current_app.autocomplete_cache.set(key, result, ttl=ttl)
+        return jsonify(result)
+
     def put(self, logged_in_user_id: int,
             id_: int,
             validator: Type[BaseModel],
@@ -102,6 +291,67 @@ class BaseAPI:
             db.session.rollback()
             raise InvalidPayloadException()
 
+    def bulk_patch(self, logged_in_user_id: int,
+                   validator: Type[BaseModel],
+                   entity: Type[Base],
+                   custom_filter=None):
+        """
+        Bulk PATCH call, sets the values of the payload on the entities selected by the ids or filter params
+        with a single UPDATE ... RETURNING and reports the result of every id
+        """
+        post_data = request.get_json()
+        if not post_data or not isinstance(post_data, dict):
+            raise InvalidPayloadException()
+        try:
+            data = validator(logged_in_user_id=logged_in_user_id, **post_data)
+        except ValidationError as e:
+            raise ValidationException(e)
+        values = {key: value for key, value in data.dict().items() if hasattr(entity, key) and value is not None}
+        if not values:
+            raise InvalidPayloadException()
+
+        ids = get_ids()
+        table = entity.__table__
+        # updated_at is set by its onupdate default
+        statement = update(table).where(and_(*get_bulk_criteria(entity, ids, custom_filter))) \
+            .values(**column_values(values)).returning(table.c.id)
+        with session_scope(db.session) as session:
+            try:
+                written = [id_ for id_, in session.execute(statement)]
+            except exc.IntegrityError:
+                raise InvalidPayloadException()
+            result_cache.mark_written(session, entity.__tablename__)
+            principal_cache.mark_written(session, entity.__tablename__, written)
+            replica_router.record_write()
+
+        results = id_results(entity, ids, written, 200)
+        return jsonify(updated=len(written), failed=len(results) - len(written), results=results), \
+            200 if len(written) == len(results) else 207
+
+    def bulk_delete(self, logged_in_user_id: int,
+                    entity: Type[Base],
+                    custom_filter=None):
+        """
+        Bulk DELETE call, deletes the entities selected by the ids or filter params
+        with a single DELETE ... RETURNING and reports the result of every id
+        """
+        ids = get_ids()
+        table = entity.__table__
+        statement = delete(table).where(and_(*get_bulk_criteria(entity, ids, custom_filter))).returning(table.c.id)
+        with session_scope(db.session) as session:
+            try:
+                written = [id_ for id_, in session.execute(statement)]
+            except exc.IntegrityError:
+                # rows still referenced by other tables fail the whole statement
+                raise InvalidPayloadException(message=f'{entity.__tablename__} is still referenced')
+            result_cache.mark_written(session, entity.__tablename__)
+            principal_cache.mark_written(session, entity.__tablename__, written)
+            replica_router.record_write()
+
+        results = id_results(entity, ids, written, 200)
+        return jsonify(deleted=len(written), failed=len(results) - len(written), results=results), \
+            200 if len(written) == len(results) else 207
+
     def delete(self, logged_in_user_id: int,
                id_: int,
                entity: Type[Base]):
@@ -0,0 +1,6 @@
+from .batch import batch_blueprint
+
+"""
+Add your batch blueprints here
+"""
+batch_blueprints = [batch_blueprint]
@@ -0,0 +1,50 @@
+import time
+from flask import Blueprint, current_app, request
+from flask_accept import accept
+
+from .... import db
+from ...common.utils.batch import BATCH_ITEM, read_batch, item_error, dispatch
+from ...common.utils.decorators import PRINCIPAL, get_principal
+from ...common.utils.exceptions import BadRequestException, UnauthorizedException, StatementTimeoutException
+from ...common.utils.serialization import jsonify, MEDIA_TYPES
+
+batch_blueprint = Blueprint('batch', __name__)
+
+
+@batch_blueprint.route('/batch', methods=['POST'])
+@accept(*MEDIA_TYPES)
+def batch():
+    """
+    Dispatch the sub-requests of the payload one after another in one app context and return their responses in order
+    The token of the batch is decoded and its user loaded once for all sub-requests. Every sub-request runs
+    in its own transaction, with its statement timeout capped at BATCH_ITEM_TIMEOUT and the time left of BATCH_TIMEOUT
+    """
+    if request.environ.get(BATCH_ITEM):
+        raise BadRequestException(message='Batches cannot be nested')
+    items = read_batch()
+    shared_environ = {}
+    if request.headers.get('Authorization'):
+        try:
+            shared_environ[PRINCIPAL] = get_principal()
+        except UnauthorizedException:
+            # sub-requests that need authentication answer 401 themselves
+            pass
+
+    deadline = time.monotonic() + current_app.config.get('BATCH_TIMEOUT') / 1000
+    results, cookies = [], []
+    for item in items:
+        time_left = int((deadline - time.monotonic()) * 1000)
+        if time_left <= 0:
+            results.append(item_error(StatementTimeoutException(message='The batch ran out of time')))
+            continue
+        # a new transaction gets the statement timeout of the sub-request
+        db.session.close()
+        result, item_cookies = dispatch(item, shared_environ, min(current_app.config.get('BATCH_ITEM_TIMEOUT'),
+                                                                  time_left))
+        results.append(result)
+        cookies.extend(item_cookies)
+
+    response = jsonify(responses=results)
+    for cookie in cookies:
+        response.headers.add('Set-Cookie', cookie)
+    return response
@@ -1,4 +1,4 @@
-from flask import jsonify, Blueprint
+from flask import Blueprint
 from flask_accept import accept
 from flask.views import MethodView
 
@@ -7,12 +7,13 @@ from ....models.user import User
 from ...common.utils.helpers import register_api
 from ...common.utils.exceptions import NotImplementedException
 from ...common.utils.decorators import authenticate
+from ...common.utils.serialization import jsonify, MEDIA_TYPES
 
 user_blueprint = Blueprint('user', __name__)
 
 
 class UserAPI(BaseAPI, MethodView):
-    decorators = [accept('application/json'), authenticate]
+    decorators = [accept(*MEDIA_TYPES), authenticate]
 
     def post(self, logged_in_user_id: int, **kwargs):
         raise NotImplementedException()
@@ -28,7 +29,10 @@ class UserAPI(BaseAPI, MethodView):
     def put(self, logged_in_user_id: int, user_id: int, **kwargs):
         raise NotImplementedException()
 
-    def delete(self, logged_in_user_id: int, user_id: int, **kwargs):
+    def patch(self, logged_in_user_id: int, **kwargs):
+        raise NotImplementedException()
+
+    def delete(self, logged_in_user_id: int, user_id: int = None, **kwargs):
         raise NotImplementedException()
 
 
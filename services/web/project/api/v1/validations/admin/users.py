@@ -7,13 +7,18 @@ from .....models.user import User, UserRole
 from ..... import bcrypt
 
 
-class UsersPost(BaseModel):
+class UsersBulkPost(BaseModel):
+    """
+    User of a bulk POST, uniqueness is checked for the whole batch at once
+    """
     email: EmailStr
     username: str
     password: str
     name: str
     role: UserRole = UserRole.USER
 
+
+class UsersPost(UsersBulkPost):
     @validator('email')
     def validate_email(cls, email):
         if User.exists(User.email == email):
@@ -27,6 +32,15 @@ class UsersPost(BaseModel):
         return username
 
 
+class UsersBulkPatch(BaseModel):
+    """
+    Values set on every user of a bulk PATCH, unique and per user fields cannot be set in bulk
+    """
+    name: Optional[str]
+    role: Optional[UserRole]
+    active: Optional[bool]
+
+
 class UsersPut(BaseModel):
     model: User
     email: Optional[EmailStr]
@@ -1,8 +1,27 @@
 import os
 import logging
 
+from .api.common.utils.pool import MeteredQueuePool, MeteredNullPool
+
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def engine_options(pool_size: int, max_overflow: int, pool_timeout: int = 10, pool_recycle: int = 1800,
+                   pool_pre_ping: bool = True) -> dict:
+    """
+    Get SQLAlchemy engine options, every engine (primary and each replica) of every worker process gets such a pool
+    Behind PgBouncer in transaction pooling mode (DATABASE_PGBOUNCER=true) PgBouncer does the pooling instead,
+    psycopg2 never uses server side prepared statements and session settings here are transaction local
+    """
+    if os.environ.get('DATABASE_PGBOUNCER', 'false').lower() == 'true':
+        return {'poolclass': MeteredNullPool}
+    return {'poolclass': MeteredQueuePool,
+            'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', pool_size)),
+            'max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW', max_overflow)),
+            'pool_timeout': pool_timeout,  # seconds waiting for a connection when the pool is exhausted
+            'pool_recycle': pool_recycle,  # seconds, older connections are replaced, keep below server idle timeouts
+            'pool_pre_ping': pool_pre_ping}  # test connections on checkout, replaces stale ones after failover
+
 class BaseConfig:
     """
     Base Configuration
@@ -39,11 +58,73 @@ class BaseConfig:
     STATIC_FOLDER = f"{os.environ.get('APP_FOLDER')}/project/static"
     MEDIA_FOLDER = f"{os.environ.get('APP_FOLDER')}/project/media"
 
+    # JSON serialization backend of responses, orjson or json (stdlib)
+    JSON_BACKEND = 'orjson'
+
     # Pagination
     POSTS_PER_PAGE = 10
     MAX_PER_PAGE = 100
+    PAGINATION_COUNT_MODE = 'exact'  # exact, estimate or none, clients can override with count param
     DATE_FORMAT = '%m-%d-%Y, %H:%M:%S'
 
+    # Database work per request
+    STATEMENT_TIMEOUT = 5000  # milliseconds, 0 disables the timeout
+    STATEMENT_TIMEOUTS = {'users.users_export_api': 120000}  # per endpoint overrides of STATEMENT_TIMEOUT
+    QUERY_COST_LIMIT = None  # planner cost above which filtered list queries are rejected, None disables the check
+
+    # Response compression negotiated with Accept-Encoding, br when brotli is installed or gzip
+    COMPRESS = True
+    COMPRESS_MIN_SIZE = 1024  # bytes, smaller responses are not worth compressing, streamed ones always are
+    COMPRESS_LEVEL = 6  # gzip level, 1 (fastest) to 9 (smallest)
+    COMPRESS_BR_LEVEL = 4  # brotli quality, 0 (fastest) to 11 (smallest)
+    COMPRESS_MIMETYPES = ('application/json', 'application/msgpack', 'application/cbor', 'application/x-ndjson',
+                          'text/csv', 'text/html', 'text/plain')
+
+    # Batch endpoint
+    BATCH_MAX_REQUESTS = 20
+    BATCH_ITEM_TIMEOUT = 2000  # milliseconds, statement timeout of each sub-request
+    BATCH_TIMEOUT = 10000  # milliseconds, sub-requests not started by then are answered with 504
+
+    # Read replicas, reads of GET requests are spread over them and writes go to the primary
+    SQLALCHEMY_BINDS = {f'replica_{i}': uri for i, uri in enumerate(os.environ.get('DATABASE_REPLICA_URLS', '').split(','))
+                        if uri}
+    REPLICA_BINDS = tuple(SQLALCHEMY_BINDS)
+    REPLICA_MAX_LAG = 5  # seconds, replicas further behind are skipped
+    REPLICA_LAG_CHECK_INTERVAL = 1  # seconds between lag checks of a replica
+    REPLICA_READ_YOUR_WRITES = 5  # seconds a client reads from the primary after its own write
+    REPLICA_RECENT_WRITERS_SIZE = 10000
+
+    # Result cache of GET endpoints, per process, entries of an entity are invalidated when it is written
+    RESULT_CACHE_SIZE = 1024
+    RESULT_CACHE_TTL = 5  # seconds, 0 disables the cache
+
+    # Fragment cache of the JSON of single rows in list pages, per process, keyed by id and updated_at
+    FRAGMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024  # 0 disables the cache
+
+    # Principal cache of the active status and role of authenticated users, per process,
+    # users are invalidated when they are written, other processes see the write after the TTL
+    PRINCIPAL_CACHE_SIZE = 10000
+    PRINCIPAL_CACHE_TTL = 30  # seconds, 0 disables the cache
+
+    # Autocomplete
+    AUTOCOMPLETE_LIMIT = 10
+    AUTOCOMPLETE_MAX_LIMIT = 25
+    AUTOCOMPLETE_MIN_LENGTH = 3  # shorter prefixes match too much of the table, nothing is suggested
+    AUTOCOMPLETE_CACHE_SIZE = 4096
+    AUTOCOMPLETE_CACHE_TTL = 10  # seconds, 0 disables the cache
+
+    # User stats
+    USER_STATS_DAYS = 30  # days of signups returned by default
+    USER_STATS_MAX_DAYS = 366
+
+    # Bulk endpoints
+    BULK_MAX_ROWS = 1000
+    BULK_CHUNK_SIZE = 500  # rows per INSERT statement
+    BULK_HASH_WORKERS = None  # processes hashing passwords, None for one per CPU
+
+    # Export
+    EXPORT_CHUNK_SIZE = 1000  # rows fetched from the server side cursor and written to the response at a time
+
     # Social Authentication
     GITHUB_CLIENT_ID = os.environ.get("GITHUB_CLIENT_ID", None)
     GITHUB_CLIENT_SECRET = os.environ.get("GITHUB_CLIENT_SECRET", None)
@@ -56,6 +137,7 @@ class DevelopmentConfig(BaseConfig):
     """
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=5, max_overflow=10)
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
     BCRYPT_LOG_ROUNDS = 4
@@ -80,9 +162,17 @@ class TestingConfig(BaseConfig):
     TOKEN_EMAIL_EXPIRATION_DAYS = 1
     TOKEN_EMAIL_EXPIRATION_SECONDS = 0
     MAIL_SUPPRESS_SEND = True
+    RESULT_CACHE_TTL = 0
+    AUTOCOMPLETE_CACHE_TTL = 0
+    PRINCIPAL_CACHE_TTL = 0
+    BULK_HASH_WORKERS = 2
 
     # Config
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_TEST_URL')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=2, max_overflow=5, pool_timeout=5)
+    # the primary poses as replica so reads take the replica path
+    SQLALCHEMY_BINDS = {'replica_0': os.environ.get('DATABASE_TEST_URL')}
+    REPLICA_BINDS = ('replica_0',)
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_TEST_URL')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
     CELERY_TASK_ALWAYS_EAGER = True
@@ -94,5 +184,7 @@ class ProductionConfig(BaseConfig):
     """
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    # sized for gunicorn threads or gevent requests per worker, workers * (pool_size + max_overflow) must fit max_connections
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=10, max_overflow=10)
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
@@ -1,10 +1,60 @@
 from __future__ import annotations
 from datetime import datetime
+from functools import lru_cache
+from operator import methodcaller
 import json
-from typing import Type
+from typing import Type, Callable
+
+from sqlalchemy import event
 
 from .. import db
 
+SERIALIZER_CACHE_SIZE = 256
+
+
+@event.listens_for(db.metadata, 'before_create')
+def create_extensions(target, connection, **kwargs):
+    """
+    Create the Postgres extensions listed in metadata info by the models, e.g. pg_trgm for trigram indexes
+    On Postgres 12 this needs a superuser, database/create-multiple-postgresql-databases.sh creates them up front
+    """
+    if not kwargs.get('tables'):
+        # nothing to create, e.g. create_all on a replica bind
+        return
+    for extension in sorted(target.info.get('extensions', ())):
+        connection.execute(f'CREATE EXTENSION IF NOT EXISTS {extension}')
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def compile_serializer(entity: Type, fields: tuple) -> Callable:
+    """
+    Compile a function returning the dict of fields of a model of entity, without a loop or getattr per row.
+    Loaded columns are read from the instance dict, skipping the attribute instrumentation, the attributes
+    are read instead when one of them is not loaded, e.g. expired. Enum names are looked up in a dict built once
+    """
+    columns = {column.key for column in entity.__mapper__.column_attrs}
+    namespace = {}
+    fast, slow = [], []
+    for field in fields:
+        if not field.isidentifier():
+            raise ValueError(f'{field} is not a field of {entity.__name__}')
+        if field in entity.__enum_names__:
+            column, enum = entity.__enum_names__[field]
+            namespace[f'_{field}'] = {member.value: member.name for member in enum}
+            fast.append(f'{field!r}: _{field}.get(values[{column!r}])' if column in columns else
+                        f'{field!r}: _{field}.get(model.{column})')
+            slow.append(f'{field!r}: _{field}.get(model.{column})')
+        else:
+            fast.append(f'{field!r}: values[{field!r}]' if field in columns else f'{field!r}: model.{field}')
+            slow.append(f'{field!r}: model.{field}')
+    exec(f'def serialize(model):\n'
+         f'    values = model.__dict__\n'
+         f'    try:\n'
+         f'        return {{{", ".join(fast)}}}\n'
+         f'    except KeyError:\n'
+         f'        return {{{", ".join(slow)}}}\n', namespace)
+    return namespace['serialize']
+
 
 class Base(db.Model):
     """
@@ -13,14 +63,29 @@ class Base(db.Model):
     __abstract__ = True
     __tablename__ = "base"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now())
-    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now(), onupdate=datetime.now())
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+    # Columns allowed in the filter param of list endpoints
+    __filterable__ = ('id', 'created_at', 'updated_at')
+    # Columns allowed in order_by and as keyset pagination sort keys, must be non-nullable
+    __sortable__ = ('id', 'created_at', 'updated_at')
+    # tsvector column searched with the q param of list endpoints, None if the entity is not searchable
+    __searchable__ = None
+    # Text columns matched by the autocomplete endpoint, they need trigram indexes
+    __autocomplete__ = ()
+    # Fields clients can select with the fields param, mapped to the columns they are computed from
+    __selectable__ = {'id': ('id',), 'created_at': ('created_at',), 'updated_at': ('updated_at',)}
+    # Fields of the JSON representation, in order
+    __json__ = ('id', 'created_at', 'updated_at')
+    # Fields holding the name of the enum member whose value is stored in a column, {field: (column, enum)}
+    __enum_names__ = {}
 
     def __init__(self,
-                 created_at: datetime = datetime.now(),
-                 updated_at: datetime = datetime.now()):
-        self.created_at = created_at
-        self.updated_at = updated_at
+                 created_at: datetime = None,
+                 updated_at: datetime = None):
+        self.created_at = created_at or datetime.now()
+        self.updated_at = updated_at or self.created_at
 
     @classmethod
     def first_by(cls, **kwargs) -> Base:
@@ -50,13 +115,35 @@ class Base(db.Model):
         """
         return cls.query.get(_id)
 
-    # This must be overridden by derived classes
+    @classmethod
+    def serializer(cls, fields: list = None, json_func: str = 'json') -> Callable:
+        """
+        Get the function serializing a model to the given fields or else to its json_func representation
+        The fields and the __json__ fields of json are compiled once per class, other representations
+        and overridden json methods are called as they are
+        """
+        if fields:
+            return compile_serializer(cls, tuple(fields))
+        if cls.compiles(fields, json_func):
+            return compile_serializer(cls, cls.__json__)
+        return methodcaller(json_func)
+
+    @classmethod
+    def compiles(cls, fields: list = None, json_func: str = 'json') -> bool:
+        """
+        Check if the representation is compiled by serializer, it then depends on nothing but the row,
+        so it does not change until updated_at does
+        """
+        return bool(fields) or (json_func == 'json' and cls.json is Base.json)
+
     def json(self) -> json:
         """
-        Get model data in JSON format
+        Get model data in JSON format, the __json__ fields
+        """
+        return compile_serializer(type(self), self.__json__)(self)
+
+    def json_fields(self, fields: list) -> json:
+        """
+        Get only the given fields of model data in JSON format, fields must be in __selectable__
         """
-        return {
-            'id': self.id,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at
-        }
\ No newline at end of file
+        return compile_serializer(type(self), tuple(fields))(self)
@@ -17,10 +17,14 @@ class Group(Base):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_group_created_at_id', 'created_at', 'id'),
+    )
+
     def __init__(self,
                  name: str,
-                 created_at: datetime = datetime.now(),
-                 updated_at: datetime = datetime.now(),
+                 created_at: datetime = None,
+                 updated_at: datetime = None,
                  **kwargs):
         super().__init__(created_at, updated_at)
         self.name = name
\ No newline at end of file
@@ -3,14 +3,17 @@ import jwt
 from enum import Enum, IntFlag
 from datetime import datetime, timedelta
 from flask import current_app
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.associationproxy import association_proxy
-import json
 
 from .base import Base
 from .. import db, bcrypt
 from ..api.common.utils.exceptions import UnauthorizedException, BadRequestException
 
 
+db.metadata.info.setdefault('extensions', set()).add('pg_trgm')
+
+
 class UserRole(IntFlag):
     """"
     User role
@@ -32,6 +35,18 @@ class User(Base):
     User model
     """
     __tablename__ = "user"
+    __filterable__ = ('id', 'created_at', 'updated_at', 'email', 'username', 'name', 'active', 'role',
+                      'email_validation_date', 'social_type')
+    __sortable__ = ('id', 'created_at', 'updated_at', 'email', 'username', 'name')
+    __searchable__ = 'search_vector'
+    __autocomplete__ = ('username', 'email')
+    __selectable__ = {'id': ('id',), 'email': ('email',), 'username': ('username',), 'name': ('name',),
+                      'active': ('active',), 'created_at': ('created_at',), 'updated_at': ('updated_at',),
+                      'role': ('role',), 'role_name': ('role',), 'social_type': ('social_type',),
+                      'email_validation_date': ('email_validation_date',)}
+    __json__ = ('id', 'email', 'username', 'name', 'active', 'created_at', 'updated_at', 'role', 'role_name',
+                'social_type', 'email_validation_date')
+    __enum_names__ = {'role_name': ('role', UserRole)}
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     email = db.Column(db.String(128), unique=True, nullable=False)
     username = db.Column(db.String(128), unique=True, nullable=False)
@@ -48,6 +63,27 @@ class User(Base):
     social_type = db.Column(db.String(64), default=None, nullable=True)
     social_access_token = db.Column(db.String, nullable=True)
 
+    # Search, generated from name, username and email with @ and . split so their parts are words
+    search_vector = db.deferred(db.Column(TSVECTOR, db.Computed(
+        "to_tsvector('simple', translate(name || ' ' || username || ' ' || email, '@.', '  '))", persisted=True)))
+
+    # Created online with manage.py create_indexes
+    __table_args__ = (
+        # default created_at desc ordering and keyset pagination of BaseAPI.get
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+        # listings limited to active users
+        db.Index('ix_user_active_created_at_id', 'created_at', 'id', postgresql_where=active),
+        db.Index('ix_user_active_role', 'role', postgresql_where=active),
+        # case insensitive email lookups, e.g. finding accounts whose emails differ only in case;
+        # login and password recovery match exactly through the unique constraint, lower(email) is not unique
+        db.Index('ix_user_email_lower', db.func.lower(email)),
+        # full text search of the q param
+        db.Index('ix_user_search_vector', search_vector, postgresql_using='gin'),
+        # autocomplete prefix and similarity lookups
+        db.Index('ix_user_username_trgm', 'username', postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}),
+        db.Index('ix_user_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+    )
+
     # Foreign relationships
     associated_groups = db.relationship("UserGroupAssociation", back_populates="user")
     groups = association_proxy('associated_groups', 'group')
@@ -63,8 +99,8 @@ class User(Base):
                  social_id: str = None,
                  social_type: SocialAuth = None,
                  social_access_token: str = None,
-                 created_at: datetime = datetime.now(),
-                 updated_at: datetime = datetime.now(),
+                 created_at: datetime = None,
+                 updated_at: datetime = None,
                  **kwargs):
         super().__init__(created_at, updated_at)
         self.email = email
@@ -81,23 +117,12 @@ class User(Base):
             self.social_type = social_type.value
             self.social_access_token = social_access_token
 
-    def json(self) -> json:
+    @property
+    def role_name(self) -> str:
         """
-        Get user data in JSON format
+        Get name of user role
         """
-        return {
-            'id': self.id,
-            'email': self.email,
-            'username': self.username,
-            'name': self.name,
-            'active': self.active,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at,
-            'role': self.role,
-            'role_name': UserRole(self.role).name,
-            'social_type': self.social_type,
-            'email_validation_date': self.email_validation_date
-        }
+        return UserRole(self.role).name
 
     def encode_auth_token(self) -> str:
         """
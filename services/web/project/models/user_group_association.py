@@ -15,14 +15,19 @@ class UserGroupAssociation(Base):
     group_id = db.Column(db.Integer, db.ForeignKey('group.id'), primary_key=True)
     user = db.relationship("User", back_populates="associated_groups")
     group = db.relationship("Group", back_populates="associated_users")
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now())
-    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now(), onupdate=datetime.now())
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        # users of a group, the primary key only covers groups of a user
+        db.Index('ix_user_group_associations_group_id', 'group_id'),
+    )
 
     def __init__(self,
                  user: User,
                  group: Group,
-                 created_at: datetime = datetime.now(),
-                 updated_at: datetime = datetime.now(),
+                 created_at: datetime = None,
+                 updated_at: datetime = None,
                  **kwargs):
         super().__init__(created_at, updated_at)
         self.user = user
@@ -0,0 +1,158 @@
+from __future__ import annotations
+from datetime import date, timedelta
+import json
+
+from sqlalchemy import event
+
+from .. import db
+from .user import UserRole
+
+# Rollups are kept up to date by triggers on user, so every insert, update and delete, including bulk statements
+# that bypass the ORM, is counted in the same transaction. Each statement adds -1 for the old rows and +1 for the new
+# ones, summed per rollup row from the transition tables so rows whose count does not change are not touched.
+# The rollup rows are upserted in key order, concurrent writes lock them in the same order and cannot deadlock.
+USER_STATS_TRIGGERS = (
+    """
+    CREATE OR REPLACE FUNCTION user_stats_trigger() RETURNS trigger AS $$
+    DECLARE
+        _changes text;
+    BEGIN
+        -- each operation only has the transition tables it references, so the changes are read by a dynamic query
+        _changes := 'WITH changes (role, active, social_type, created_at, delta) AS (' || concat_ws(' UNION ALL ',
+            CASE WHEN TG_OP IN ('UPDATE', 'DELETE') THEN
+                'SELECT role, active, social_type::text, created_at, -1 FROM old_rows'
+            END,
+            CASE WHEN TG_OP IN ('INSERT', 'UPDATE') THEN
+                'SELECT role, active, social_type::text, created_at, 1 FROM new_rows'
+            END) || ') ';
+        EXECUTE _changes || $sql$
+            INSERT INTO user_stat (dimension, value, count)
+            SELECT dimension, value, sum(delta) FROM (
+                SELECT 'role' AS dimension, role::text AS value, delta FROM changes
+                UNION ALL
+                SELECT 'active', active::text, delta FROM changes
+                UNION ALL
+                SELECT 'social_type', coalesce(social_type, ''), delta FROM changes
+            ) AS stats
+            GROUP BY dimension, value HAVING sum(delta) <> 0
+            ORDER BY dimension, value
+            ON CONFLICT (dimension, value) DO UPDATE SET count = user_stat.count + EXCLUDED.count
+        $sql$;
+        EXECUTE _changes || $sql$
+            INSERT INTO user_signup_day (day, count)
+            SELECT created_at::date, sum(delta) FROM changes
+            GROUP BY created_at::date HAVING sum(delta) <> 0
+            ORDER BY created_at::date
+            ON CONFLICT (day) DO UPDATE SET count = user_signup_day.count + EXCLUDED.count
+        $sql$;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS user_stats_insert ON "user"',
+    'CREATE TRIGGER user_stats_insert AFTER INSERT ON "user" REFERENCING NEW TABLE AS new_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION user_stats_trigger()',
+    # transition tables rule out a column list, updates of other columns sum to no change and touch no rollup
+    'DROP TRIGGER IF EXISTS user_stats_update ON "user"',
+    'CREATE TRIGGER user_stats_update AFTER UPDATE ON "user" REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION user_stats_trigger()',
+    'DROP TRIGGER IF EXISTS user_stats_delete ON "user"',
+    'CREATE TRIGGER user_stats_delete AFTER DELETE ON "user" REFERENCING OLD TABLE AS old_rows '
+    'FOR EACH STATEMENT EXECUTE FUNCTION user_stats_trigger()',
+)
+
+USER_STATS_REBUILD = (
+    # block user writes until the rebuild commits so no change is counted twice or missed
+    'LOCK TABLE "user" IN SHARE MODE',
+    'DELETE FROM user_stat',
+    'DELETE FROM user_signup_day',
+    """
+    INSERT INTO user_stat (dimension, value, count)
+    SELECT 'role', role::text, count(*) FROM "user" GROUP BY role
+    UNION ALL
+    SELECT 'active', active::text, count(*) FROM "user" GROUP BY active
+    UNION ALL
+    SELECT 'social_type', coalesce(social_type, ''), count(*) FROM "user" GROUP BY social_type
+    """,
+    """
+    INSERT INTO user_signup_day (day, count)
+    SELECT created_at::date, count(*) FROM "user" GROUP BY created_at::date
+    """,
+)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def create_user_stats_triggers(target, connection, **kwargs):
+    """
+    Install the triggers maintaining the user rollups once user and the rollup tables exist
+    """
+    if not kwargs.get('tables'):
+        # nothing was created, e.g. create_all on a replica bind, UserStat.rebuild installs the triggers if missing
+        return
+    for statement in USER_STATS_TRIGGERS:
+        connection.execute(statement)
+
+
+class UserStat(db.Model):
+    """
+    Number of users per value of a dimension (role, active or social_type)
+    """
+    __tablename__ = "user_stat"
+    dimension = db.Column(db.String(32), primary_key=True)
+    # text form of the value, empty string for null
+    value = db.Column(db.String(128), primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Install the rollup triggers and recompute every user rollup from the user table, in the current transaction
+        """
+        for statement in (*USER_STATS_TRIGGERS, *USER_STATS_REBUILD):
+            db.session.execute(statement)
+
+    @classmethod
+    def dimensions(cls) -> dict:
+        """
+        Get user counts grouped by dimension, values are converted back to the type of the user column
+        """
+        result = {'role': [], 'active': [], 'social_type': []}
+        for stat in cls.query.filter(cls.count > 0).order_by(cls.dimension, cls.value):
+            result[stat.dimension].append(stat.json())
+        return result
+
+    def json(self) -> json:
+        """
+        Get stat data in JSON format
+        """
+        if self.dimension == 'role':
+            return {'role': int(self.value), 'role_name': UserRole(int(self.value)).name, 'count': self.count}
+        if self.dimension == 'active':
+            return {'active': self.value == 'true', 'count': self.count}
+        return {self.dimension: self.value or None, 'count': self.count}
+
+
+class UserSignupDay(db.Model):
+    """
+    Number of users created per day
+    """
+    __tablename__ = "user_signup_day"
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @classmethod
+    def last_days(cls, days: int) -> list:
+        """
+        Get signups of the last days, days without signups are omitted
+        """
+        since = date.today() - timedelta(days=days - 1)
+        return cls.query.filter(cls.day >= since, cls.count > 0).order_by(cls.day).all()
+
+    def json(self) -> json:
+        """
+        Get signup data in JSON format
+        """
+        return {
+            'day': self.day.isoformat(),
+            'count': self.count
+        }
@@ -3,9 +3,11 @@ from datetime import datetime, timedelta
 from mimesis import Person
 from flask import current_app
 
+from project import db
 from project.models.user import User
 from project.api.common.utils.constants import Constants
 from project.models.user import UserRole
+from project.api.common.utils.serialization import dumps
 from tests.base import BaseTestCase
 from tests.utils import add_user, add_user_password
 
@@ -48,6 +50,96 @@ class TestUsersBlueprint(BaseTestCase):
             self.assertEqual(user.email, data['email'])
             self.assertEqual(user.username, data['username'])
 
+    def test_users_get_fields(self):
+        """Ensure fields param in get users only returns the selected fields."""
+        user = add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            params = dict(fields='id,username,role_name')
+            response = self.client.get(f'{self.url}{user.id}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual({'id': user.id, 'username': user.username, 'role_name': 'USER'}, data)
+
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data['users']), 2)
+            for item in data['users']:
+                self.assertEqual({'id', 'username', 'role_name'}, set(item))
+
+            """ Tests field outside of the whitelist"""
+            params = dict(fields='id,password')
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual('Invalid fields: password', data['message'])
+
+    def test_users_get_conditional(self):
+        """Ensure get users answers conditional requests with 304 until the user is modified."""
+        user = add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            headers = [('Accept', 'application/json'),
+                       (Constants.HttpHeaders.AUTHORIZATION,
+                        'Bearer ' + json.loads(resp_login.data.decode())['auth_token'])]
+            response = self.client.get(f'{self.url}{user.id}', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers['ETag']
+            last_modified = response.headers['Last-Modified']
+
+            response = self.client.get(f'{self.url}{user.id}', headers=headers + [('If-None-Match', etag)])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(b'', response.data)
+            response = self.client.get(f'{self.url}{user.id}',
+                                       headers=headers + [('If-Modified-Since', last_modified)])
+            self.assertEqual(response.status_code, 304)
+
+            """ Tests list page"""
+            response = self.client.get(f'{self.url}', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            list_etag = response.headers['ETag']
+            response = self.client.get(f'{self.url}', headers=headers + [('If-None-Match', list_etag)])
+            self.assertEqual(response.status_code, 304)
+
+            """ Tests validators change when the user is modified"""
+            response = self.client.put(f'{self.url}{user.id}', data=json.dumps(dict(name='Modified')),
+                                       content_type='application/json', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(f'{self.url}{user.id}', headers=headers + [('If-None-Match', etag)])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('Modified', json.loads(response.data.decode())['name'])
+            response = self.client.get(f'{self.url}', headers=headers + [('If-None-Match', list_etag)])
+            self.assertEqual(response.status_code, 200)
+
     def test_users_get_no_id(self):
         """Ensure error is thrown if an id is not provided."""
         admin, password = add_user_password(role=UserRole.ADMIN)
@@ -510,6 +602,118 @@ class TestUsersBlueprint(BaseTestCase):
             self.assertEqual(response.content_type, 'application/json')
             self.assertEqual(response.status_code, 200)
 
+    def test_users_bulk_post(self):
+        """Ensure bulk post adds valid users and reports invalid, repeated and existing ones per row."""
+        existing = add_user(email='existing@example.com', username='existing')
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        users = [dict(email='first@example.com', username='first', name='First', password='123456'),
+                 dict(email='second@example.com', username='second', name='Second', password='123456',
+                      role=UserRole.ADMIN),
+                 dict(email='not an email', username='third', name='Third', password='123456'),
+                 dict(email='fourth@example.com', username='first', name='Fourth', password='123456'),
+                 dict(email=existing.email, username='fifth', name='Fifth', password='123456')]
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.post(
+                f'{self.url}bulk',
+                data=json.dumps(users),
+                content_type='application/json',
+                headers=[('Accept', 'application/json'),
+                         (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 207)
+            self.assertEqual(2, data['added'])
+            self.assertEqual(3, data['failed'])
+            self.assertEqual([201, 201, 400, 400, 400], [result['code'] for result in data['results']])
+            self.assertEqual('email', data['results'][2]['errors'][0]['field'])
+            self.assertEqual('username', data['results'][3]['errors'][0]['field'])
+            self.assertEqual('email', data['results'][4]['errors'][0]['field'])
+
+            second = User.get(data['results'][1]['id'])
+            self.assertEqual('second', second.username)
+            self.assertEqual(UserRole.ADMIN, second.role)
+
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email='first@example.com',
+                    password='123456'
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            self.assertEqual(resp_login.status_code, 200)
+
+    def test_users_bulk_post_ndjson(self):
+        """Ensure bulk post reads NDJSON and rejects lines that are not JSON objects."""
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        lines = [json.dumps(dict(email='first@example.com', username='first', name='First', password='123456')),
+                 'not json',
+                 json.dumps(dict(email='second@example.com', username='second', name='Second', password='123456'))]
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.post(
+                f'{self.url}bulk',
+                data='\n'.join(lines),
+                content_type='application/x-ndjson',
+                headers=[('Accept', 'application/json'),
+                         (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 207)
+            self.assertEqual(2, data['added'])
+            self.assertEqual([201, 400, 201], [result['code'] for result in data['results']])
+            self.assertEqual({'first', 'second'},
+                             {user.username for user in User.query.filter(User.username.in_(['first', 'second']))})
+
+    def test_users_bulk_post_too_many(self):
+        """Ensure bulk post rejects batches larger than BULK_MAX_ROWS."""
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        users = [dict(email=f'user{index}@example.com', username=f'user{index}', name='User', password='123456')
+                 for index in range(current_app.config['BULK_MAX_ROWS'] + 1)]
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.post(
+                f'{self.url}bulk',
+                data=json.dumps(users),
+                content_type='application/json',
+                headers=[('Accept', 'application/json'),
+                         (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(0, User.query.filter(User.username.like('user%')).count())
+
     """
     Test GET [List]
     """
@@ -699,6 +903,163 @@ class TestUsersBlueprint(BaseTestCase):
             self.assertTrue('number_of_pages' in data)
             self.assertEqual(1, data['number_of_pages'])
 
+    def test_users_get_all_filter_language(self):
+        """Ensure filter language in get all users combines criteria and rejects unknown fields."""
+        add_user(name='Filter Match', role=UserRole.ADMIN)
+        add_user(name='Filter Match')
+        add_user(name='No Match')
+
+        admin, password = add_user_password(role=UserRole.ADMIN)
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+
+            params = dict(filter="(name like 'Filter%' and (role = 2 or active = false))")
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data['users']), 1)
+            self.assertEqual('Filter Match', data['users'][0]['name'])
+
+            """ Tests field outside of the whitelist"""
+            params = dict(filter="(password like '%')")
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual('Invalid filter: password is not a valid field', data['message'])
+
+            """ Tests raw SQL is rejected"""
+            params = dict(filter="(1 = 1; drop table user)")
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 400)
+
+    def test_users_get_all_search(self):
+        """Ensure q param in get all users finds users by fragments of name, username or email."""
+        john = add_user(name='John Smithson', email='jsmith@example.com', username='jsmith')
+        add_user(name='Johanna Doe', email='jdoe@example.com', username='jdoe')
+        add_user(name='Someone Else', email='else@example.com', username='else')
+
+        admin, password = add_user_password(role=UserRole.ADMIN, name='Admin', email='admin@admin.org',
+                                            username='admin')
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+
+            params = dict(q='joh smi')
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([john.id], [user['id'] for user in data['users']])
+
+            params = dict(q='joh', per_page=1, page=2)
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(2, data['number_of_pages'])
+            self.assertEqual(1, len(data['users']))
+
+            params = dict(q='example.com', filter="(username = 'jdoe')")
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(['jdoe'], [user['username'] for user in data['users']])
+
+    def test_users_autocomplete(self):
+        """Ensure users autocomplete suggests users by username or email prefix and similarity."""
+        jsmith = add_user(name='John Smithson', email='jsmith@example.com', username='jsmith')
+        jsmyth = add_user(name='Jane Smyth', email='jane@example.org', username='jsmyth')
+        add_user(name='Someone Else', email='else@example.com', username='else')
+
+        admin, password = add_user_password(role=UserRole.ADMIN, name='Admin', email='admin@admin.org',
+                                            username='admin')
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+
+            params = dict(q='JSM')
+            response = self.client.get(f'{self.url}autocomplete', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual({jsmith.id, jsmyth.id}, {user['id'] for user in data['users']})
+            self.assertEqual({'id', 'username', 'email'}, set(data['users'][0]))
+
+            params = dict(q='jsmith', limit=1, fields='id,name')
+            response = self.client.get(f'{self.url}autocomplete', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([{'id': jsmith.id, 'name': jsmith.name}], data['users'])
+
+            # wildcards are matched literally
+            params = dict(q='%%%')
+            response = self.client.get(f'{self.url}autocomplete', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([], data['users'])
+
+            # prefixes shorter than AUTOCOMPLETE_MIN_LENGTH suggest nothing
+            params = dict(q='js')
+            response = self.client.get(f'{self.url}autocomplete', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([], data['users'])
+
     def test_users_get_all_order_by(self):
         """Ensure order_by in get all users behaves correctly."""
         user_list = []
@@ -743,6 +1104,225 @@ class TestUsersBlueprint(BaseTestCase):
             for i in range(len(data['users'])):
                 self.assertNotEqual(data['users'][i]['email'], user_list[i].email)
 
+    def test_users_get_all_cursor(self):
+        """Ensure cursor pagination in get all users walks every user exactly once."""
+        # Add n random users
+        number_of_items = 12
+        for i in range(number_of_items):
+            add_user()
+
+        admin, password = add_user_password(role=UserRole.ADMIN)
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            seen = []
+            params = dict(cursor='', per_page=5)
+            while True:
+                response = self.client.get(f'{self.url}', query_string=params,
+                                           headers=[('Accept', 'application/json'),
+                                                    (Constants.HttpHeaders.AUTHORIZATION,
+                                                     'Bearer ' + auth_token)])
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue('next_cursor' in data)
+                self.assertFalse('number_of_pages' in data)
+                seen.extend(user['id'] for user in data['users'])
+                if not data['next_cursor']:
+                    break
+                self.assertEqual(len(data['users']), 5)
+                params['cursor'] = data['next_cursor']
+
+            # Add 1 for admin user
+            self.assertEqual(len(seen), number_of_items + 1)
+            self.assertEqual(len(set(seen)), number_of_items + 1)
+            self.assertEqual(seen[0], admin.id)
+
+            """ Tests sort on non whitelisted column"""
+            params = dict(cursor='', sort='password')
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 400)
+
+            """ Tests malformed cursor"""
+            params = dict(cursor='blah')
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual('Invalid cursor', data['message'])
+
+            """ Tests orders the cursor cannot follow"""
+            for params in (dict(cursor='', order_by='(created_at asc)'), dict(cursor='', q='example')):
+                response = self.client.get(f'{self.url}', query_string=params,
+                                           headers=[('Accept', 'application/json'),
+                                                    (Constants.HttpHeaders.AUTHORIZATION,
+                                                     'Bearer ' + auth_token)])
+                self.assertEqual(response.status_code, 400)
+
+            """ Tests search results in an explicit sort order"""
+            params = dict(cursor='', q=admin.email, sort='id')
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([admin.id], [user['id'] for user in data['users']])
+
+    def test_users_get_all_count_mode(self):
+        """Ensure count param in get all users controls how number_of_pages is computed."""
+        # Add n random users
+        number_of_items = 24
+        for i in range(number_of_items):
+            add_user()
+
+        admin, password = add_user_password(role=UserRole.ADMIN)
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+
+            """ Tests default exact count"""
+            response = self.client.get(f'{self.url}',
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('exact', data['count_mode'])
+            self.assertEqual(3, data['number_of_pages'])
+            self.assertTrue(data['has_next'])
+
+            """ Tests skipped count"""
+            params = dict(count='none', page=3)
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('none', data['count_mode'])
+            self.assertIsNone(data['number_of_pages'])
+            self.assertFalse(data['has_next'])
+            self.assertEqual(len(data['users']), 5)
+
+            """ Tests estimated count"""
+            params = dict(count='estimate')
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('estimate', data['count_mode'])
+            self.assertTrue(isinstance(data['number_of_pages'], int))
+
+            """ Tests invalid count mode"""
+            params = dict(count='blah')
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 400)
+
+    def test_users_get_all_db_json(self):
+        """Ensure users rendered as JSON by the database are the same as when serialized by the app."""
+        user1 = add_user(created_at=datetime(2020, 1, 2, 3, 4, 5))
+        user1.name = 'Zoë "Quote" \\ Ünïcödé'
+        user1.email_validation_date = datetime(2020, 1, 2, 3, 4, 5, 678)
+        db.session.commit()
+        add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            users = User.query.order_by(User.created_at.desc()).all()
+            for fields in (None, 'username,role_name,created_at'):
+                params = dict(fields=fields) if fields else {}
+                response = self.client.get(f'{self.url}', query_string=params,
+                                           headers=[('Accept', 'application/json'),
+                                                    (Constants.HttpHeaders.AUTHORIZATION,
+                                                     'Bearer ' + auth_token)])
+                self.assertEqual(response.status_code, 200)
+                serialize = User.serializer(fields and fields.split(','))
+                expected = json.loads(dumps([serialize(user) for user in users]))
+                self.assertEqual(json.loads(response.data.decode())['users'], expected)
+
+    def test_users_export(self):
+        """Ensure export streams every user matching the filter as NDJSON or CSV."""
+        number_of_items = 15
+        for i in range(number_of_items):
+            add_user()
+        add_user(name='Not Exported')
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            params = dict(filter="(name != 'Not Exported')")
+
+            """ Tests NDJSON"""
+            response = self.client.get(f'{self.url}export', query_string=params,
+                                       headers=[('Accept', 'application/x-ndjson'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('application/x-ndjson', response.mimetype)
+            lines = response.data.decode().splitlines()
+            # Add 1 for admin user
+            self.assertEqual(len(lines), number_of_items + 1)
+            self.assertEqual(admin.email, json.loads(lines[0])['email'])
+
+            """ Tests CSV"""
+            params['fields'] = 'id,email'
+            response = self.client.get(f'{self.url}export', query_string=params,
+                                       headers=[('Accept', 'text/csv'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('text/csv', response.mimetype)
+            lines = response.data.decode().splitlines()
+            self.assertEqual('id,email', lines[0])
+            self.assertEqual(f'{admin.id},{admin.email}', lines[1])
+            self.assertEqual(len(lines), number_of_items + 2)
+
     """
     Test PUT
     """
@@ -1265,3 +1845,134 @@ class TestUsersBlueprint(BaseTestCase):
             data = json.loads(response.data.decode())
             self.assertEqual(response.status_code, 404)
             self.assertEqual('user does not exist', data['message'])
+
+    """
+    Test bulk PATCH and DELETE
+    """
+
+    def test_users_bulk_patch(self):
+        """Ensure bulk patch updates the users selected by ids and reports missing ids."""
+        first = add_user(email='first@example.com', username='first')
+        second = add_user(email='second@example.com', username='second')
+        other = add_user(email='other@example.com', username='other')
+        admin, password = add_user_password(role=UserRole.ADMIN)
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.patch(
+                self.url,
+                query_string=dict(ids=f'{first.id},{second.id},0'),
+                data=json.dumps(dict(active=False, role=UserRole.ADMIN)),
+                content_type='application/json',
+                headers=[('Accept', 'application/json'),
+                         (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 207)
+            self.assertEqual(2, data['updated'])
+            self.assertEqual([{'id': first.id, 'code': 200}, {'id': second.id, 'code': 200}], data['results'][:2])
+            self.assertEqual(404, data['results'][2]['code'])
+            for user_id, active in ((first.id, False), (second.id, False), (other.id, True)):
+                user = User.get(user_id)
+                self.assertEqual(active, user.active)
+            self.assertEqual(UserRole.ADMIN, User.get(first.id).role)
+            self.assertGreater(User.get(first.id).updated_at, User.get(other.id).updated_at)
+
+    def test_users_bulk_patch_filter(self):
+        """Ensure bulk patch updates the users matching the filter."""
+        for username in ('first', 'second'):
+            user = add_user(email=f'{username}@example.com', username=username)
+            user.active = False
+        db.session.commit()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.patch(
+                self.url,
+                query_string={'filter': '(active = false)'},
+                data=json.dumps(dict(name='Inactive')),
+                content_type='application/json',
+                headers=[('Accept', 'application/json'),
+                         (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(2, data['updated'])
+            self.assertEqual(2, User.query.filter(User.name == 'Inactive').count())
+            self.assertNotEqual('Inactive', User.get(admin.id).name)
+
+    def test_users_bulk_patch_no_selection(self):
+        """Ensure bulk patch without ids or filter does not update every user."""
+        admin, password = add_user_password(role=UserRole.ADMIN)
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.patch(
+                self.url,
+                data=json.dumps(dict(active=False)),
+                content_type='application/json',
+                headers=[('Accept', 'application/json'),
+                         (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertTrue(User.get(admin.id).active)
+
+    def test_users_bulk_delete(self):
+        """Ensure bulk delete deletes the users selected by ids and reports missing ids."""
+        first = add_user(email='first@example.com', username='first')
+        second = add_user(email='second@example.com', username='second')
+        # the request commits and expires both users, first can not be refreshed once its row is deleted
+        first_id, second_id = first.id, second.id
+        admin, password = add_user_password(role=UserRole.ADMIN)
+
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.delete(
+                self.url,
+                query_string=dict(ids=f'{first_id},0'),
+                headers=[('Accept', 'application/json'),
+                         (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 207)
+            self.assertEqual(1, data['deleted'])
+            self.assertEqual([200, 404], [result['code'] for result in data['results']])
+            self.assertIsNone(User.get(first_id))
+            self.assertIsNotNone(User.get(second_id))
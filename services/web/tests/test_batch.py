@@ -0,0 +1,67 @@
+import json
+from flask import current_app
+
+from project.api.common.utils.constants import Constants
+from project.models.user import UserRole
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_user_password
+
+
+class TestBatchBlueprint(BaseTestCase):
+    """
+    Test batch endpoint
+    """
+    version = 'v1'
+    url = f'/{version}/batch'
+
+    def test_batch(self):
+        """Ensure batch dispatches every sub-request with the authentication of the batch and keeps their order"""
+        user = add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            requests = [dict(path=f'/{self.version}/user/'),
+                        dict(path=f'/{self.version}/users/{user.id}?fields=id,username'),
+                        dict(method='PUT', path=f'/{self.version}/users/{user.id}', body=dict(name='Batch Name')),
+                        dict(path=f'/{self.version}/users/{user.id}?fields=name'),
+                        dict(path=f'/{self.version}/users/0'),
+                        dict(method='POST', path=self.url, body=dict(requests=[]))]
+            response = self.client.post(self.url, data=json.dumps(dict(requests=requests)),
+                                        content_type='application/json',
+                                        headers=[('Accept', 'application/json'),
+                                                 (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([200, 200, 200, 200, 404, 400], [result['status'] for result in data['responses']])
+            self.assertEqual(admin.email, data['responses'][0]['body']['email'])
+            self.assertEqual({'id': user.id, 'username': user.username}, data['responses'][1]['body'])
+            self.assertIn('ETag', data['responses'][1]['headers'])
+            self.assertEqual({'name': 'Batch Name'}, data['responses'][3]['body'])
+
+    def test_batch_unauthorized(self):
+        """Ensure sub-requests of a batch without a token are not authorized"""
+        with self.client:
+            response = self.client.post(self.url, data=json.dumps(dict(requests=[dict(path=f'/{self.version}/user/')])),
+                                        content_type='application/json',
+                                        headers=[('Accept', 'application/json')])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(401, data['responses'][0]['status'])
+
+    def test_batch_too_many_requests(self):
+        """Ensure batches larger than BATCH_MAX_REQUESTS are rejected"""
+        requests = [dict(path=f'/{self.version}/user/')] * (current_app.config['BATCH_MAX_REQUESTS'] + 1)
+        with self.client:
+            response = self.client.post(self.url, data=json.dumps(dict(requests=requests)),
+                                        content_type='application/json',
+                                        headers=[('Accept', 'application/json')])
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,268 @@
+import json
+import time
+from datetime import datetime
+
+import cbor2
+from flask import current_app
+
+from project import db, result_cache, fragment_cache, principal_cache
+from project.api.common.utils.cache import TTLCache, FragmentCache
+from project.api.common.utils.constants import Constants
+from project.models.user import UserRole
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_user_password
+
+
+class TestTTLCache(BaseTestCase):
+    """
+    Test TTL/LRU cache
+    """
+
+    def test_cache_lru_eviction(self):
+        """Ensure the least recently used entry is evicted when the cache is full"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+        self.assertEqual(3, cache.stats()['hits'])
+        self.assertEqual(1, cache.stats()['misses'])
+
+    def test_cache_ttl(self):
+        """Ensure entries expire after their ttl"""
+        cache = TTLCache(maxsize=2, ttl=0.01)
+        cache.set('a', 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(0, len(cache))
+
+
+class TestFragmentCache(BaseTestCase):
+    """
+    Test fragment cache of rows
+    """
+    version = 'v1'
+
+    def test_fragment_cache_lru_eviction(self):
+        """Ensure the least recently used fragments are evicted when they exceed max_bytes"""
+        cache = FragmentCache()
+        cache.max_bytes = 6
+        cache.set('a', b'123')
+        cache.set('b', b'456')
+        self.assertEqual(b'123', cache.get('a'))
+        cache.set('c', b'789')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(b'123', cache.get('a'))
+        self.assertEqual(6, cache.stats()['bytes'])
+        self.assertEqual(2 / 3, cache.stats()['hit_ratio'])
+
+    def test_fragment_cache_render(self):
+        """Ensure only rows that are missing or were updated are encoded again"""
+        user1 = add_user()
+        user2 = add_user()
+        cache = FragmentCache(current_app)
+        encoded = []
+
+        def encode(models):
+            encoded.extend(model.id for model in models)
+            return {model.id: json.dumps({'id': model.id, 'name': model.name}).encode() for model in models}
+
+        data = cache.render(('user', None), [user1, user2], encode)
+        self.assertEqual([{'id': user1.id, 'name': user1.name}, {'id': user2.id, 'name': user2.name}],
+                         json.loads(data.decode()))
+        self.assertEqual(data, cache.render(('user', None), [user1, user2], encode))
+        self.assertEqual([user1.id, user2.id], encoded)
+
+        user2.name = 'changed'
+        db.session.commit()
+        data = cache.render(('user', None), [user1, user2], encode)
+        self.assertEqual('changed', json.loads(data.decode())[1]['name'])
+        self.assertEqual([user1.id, user2.id, user2.id], encoded)
+        self.assertEqual(3, cache.stats()['hits'])
+
+    def test_fragment_cache_users(self):
+        """Ensure list pages splice the cached rows and render only the rows that changed"""
+        user = add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            headers = [('Accept', 'application/json'),
+                       (Constants.HttpHeaders.AUTHORIZATION,
+                        'Bearer ' + json.loads(resp_login.data.decode())['auth_token'])]
+            first = self.client.get(f'/{self.version}/users/', headers=headers)
+            self.assertEqual(first.status_code, 200)
+            hits, misses = fragment_cache.stats()['hits'], fragment_cache.stats()['misses']
+            second = self.client.get(f'/{self.version}/users/', headers=headers)
+            self.assertEqual(json.loads(first.data.decode()), json.loads(second.data.decode()))
+            self.assertEqual(hits + 2, fragment_cache.stats()['hits'])
+            self.assertEqual(misses, fragment_cache.stats()['misses'])
+
+            user.name = 'Fragment Name'
+            db.session.commit()
+            response = self.client.get(f'/{self.version}/users/', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertIn('Fragment Name', [item['name'] for item in data['users']])
+            self.assertEqual(hits + 3, fragment_cache.stats()['hits'])
+            self.assertEqual(misses + 1, fragment_cache.stats()['misses'])
+
+
+class TestResultCache(BaseTestCase):
+    """
+    Test result cache of BaseAPI GET calls
+    """
+    version = 'v1'
+    url = f'/{version}/users/'
+
+    def setUp(self):
+        super().setUp()
+        current_app.config['RESULT_CACHE_TTL'] = 60
+
+    def tearDown(self):
+        current_app.config['RESULT_CACHE_TTL'] = 0
+        result_cache.cache.clear()
+        super().tearDown()
+
+    def test_result_cache_invalidated_on_write(self):
+        """Ensure cached GET results are served until the entity is written"""
+        user = add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            headers = [('Accept', 'application/json'),
+                       (Constants.HttpHeaders.AUTHORIZATION,
+                        'Bearer ' + json.loads(resp_login.data.decode())['auth_token'])]
+            hits = result_cache.stats()['hits']
+            self.client.get(f'{self.url}', headers=headers)
+            response = self.client.get(f'{self.url}', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(hits + 1, result_cache.stats()['hits'])
+
+            response = self.client.put(f'{self.url}{user.id}', data=json.dumps(dict(name='Cached Name')),
+                                       content_type='application/json', headers=headers)
+            self.assertEqual(response.status_code, 200)
+
+            response = self.client.get(f'{self.url}', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(hits + 1, result_cache.stats()['hits'])
+            self.assertIn('Cached Name', [item['name'] for item in data['users']])
+
+            response = self.client.get(f'/{self.version}/metrics/cache', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(hits + 1, data['result_cache']['hits'])
+
+    def test_result_cache_per_media_type(self):
+        """Ensure results cached for one media type are not served in another"""
+        user = add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth = (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + json.loads(resp_login.data.decode())['auth_token'])
+            for url in (self.url, f'{self.url}{user.id}'):
+                response_json = self.client.get(url, headers=[('Accept', 'application/json'), auth])
+                response = self.client.get(url, headers=[('Accept', 'application/cbor'), auth])
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual('application/cbor', response.mimetype)
+                self.assertNotEqual(response_json.headers['ETag'], response.headers['ETag'])
+                data = cbor2.loads(response.data)
+                created_at = data['users'][-1]['created_at'] if url == self.url else data['created_at']
+                self.assertIsInstance(created_at, datetime)
+
+
+class TestPrincipalCache(BaseTestCase):
+    """
+    Test principal cache of authenticated users
+    """
+    version = 'v1'
+
+    def setUp(self):
+        super().setUp()
+        current_app.config['PRINCIPAL_CACHE_TTL'] = 60
+
+    def tearDown(self):
+        current_app.config['PRINCIPAL_CACHE_TTL'] = 0
+        principal_cache.cache.clear()
+        super().tearDown()
+
+    def login(self, user, password) -> str:
+        resp_login = self.client.post(
+            f'/{self.version}/auth/login',
+            data=json.dumps(dict(
+                email=user.email,
+                password=password
+            )),
+            content_type='application/json',
+            headers=[('Accept', 'application/json')]
+        )
+        return json.loads(resp_login.data.decode())['auth_token']
+
+    def get_status(self, auth_token):
+        return self.client.get(f'/{self.version}/auth/status',
+                               headers=[('Accept', 'application/json'),
+                                        (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+
+    def test_principal_cache_invalidated_on_write(self):
+        """Ensure cached principals are served until the user is deactivated, updated or deleted"""
+        user, user_password = add_user_password()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            user_token = self.login(user, user_password)
+            admin_token = self.login(admin, password)
+            admin_headers = [('Accept', 'application/json'),
+                             (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + admin_token)]
+
+            self.assertEqual(200, self.get_status(user_token).status_code)
+            hits = principal_cache.stats()['hits']
+            self.assertEqual(200, self.get_status(user_token).status_code)
+            self.assertEqual(hits + 1, principal_cache.stats()['hits'])
+
+            """ Tests deactivation with a bulk update"""
+            response = self.client.patch(f'/{self.version}/users/', query_string=dict(ids=user.id),
+                                         data=json.dumps(dict(active=False)),
+                                         content_type='application/json', headers=admin_headers)
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(401, self.get_status(user_token).status_code)
+
+            """ Tests promotion with an update of the user"""
+            user.active = True
+            db.session.commit()
+            response = self.client.get(f'/{self.version}/users/', headers=[
+                ('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + user_token)])
+            self.assertEqual(403, response.status_code)
+            user.role = UserRole.ADMIN.value
+            db.session.commit()
+            response = self.client.get(f'/{self.version}/users/', headers=[
+                ('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + user_token)])
+            self.assertEqual(200, response.status_code)
+
+            """ Tests deletion"""
+            response = self.client.delete(f'/{self.version}/users/{user.id}', headers=admin_headers)
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(401, self.get_status(user_token).status_code)
@@ -0,0 +1,75 @@
+import gzip
+import json
+
+from project.api.common.utils.constants import Constants
+from project.models.user import UserRole
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_user_password
+
+
+class TestCompression(BaseTestCase):
+    """
+    Test response compression
+    """
+    version = 'v1'
+    url = f'/{version}/users/'
+
+    def login(self) -> str:
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        resp_login = self.client.post(
+            f'/{self.version}/auth/login',
+            data=json.dumps(dict(
+                email=admin.email,
+                password=password
+            )),
+            content_type='application/json',
+            headers=[('Accept', 'application/json')]
+        )
+        return json.loads(resp_login.data.decode())['auth_token']
+
+    def test_compressed_response(self):
+        """Ensure responses are compressed with an accepted encoding and their ETag becomes weak"""
+        for _ in range(20):
+            add_user()
+        with self.client:
+            auth_token = self.login()
+            headers = [('Accept', 'application/json'),
+                       (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            response = self.client.get(self.url, headers=headers)
+            self.assertIsNone(response.headers.get('Content-Encoding'))
+            self.assertIn('Accept-Encoding', response.headers.get('Vary'))
+            plain = json.loads(response.data.decode())
+
+            response = self.client.get(self.url, headers=[*headers, ('Accept-Encoding', 'gzip')])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('gzip', response.headers.get('Content-Encoding'))
+            self.assertTrue(response.headers.get('ETag').startswith('W/'))
+            self.assertEqual(plain, json.loads(gzip.decompress(response.data).decode()))
+
+            response = self.client.get(self.url, headers=[*headers, ('Accept-Encoding', 'gzip'),
+                                                          ('If-None-Match', response.headers.get('ETag'))])
+            self.assertEqual(response.status_code, 304)
+
+    def test_small_response_not_compressed(self):
+        """Ensure responses below COMPRESS_MIN_SIZE are not compressed"""
+        with self.client:
+            auth_token = self.login()
+            response = self.client.get(f'/{self.version}/user/',
+                                       headers=[('Accept', 'application/json'), ('Accept-Encoding', 'gzip'),
+                                                (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.headers.get('Content-Encoding'))
+
+    def test_streamed_response_compressed(self):
+        """Ensure streamed responses are compressed as they are sent"""
+        for _ in range(5):
+            add_user()
+        with self.client:
+            auth_token = self.login()
+            response = self.client.get(f'{self.url}export',
+                                       headers=[('Accept', 'application/x-ndjson'), ('Accept-Encoding', 'gzip'),
+                                                (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual('gzip', response.headers.get('Content-Encoding'))
+            lines = gzip.decompress(response.data).decode().splitlines()
+            self.assertEqual(6, len(lines))
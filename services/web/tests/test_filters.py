@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from project.models.user import User
+from project.api.common.utils.filters import parse_filter, parse_order_by, compile_filter, FilterError
+from tests.base import BaseTestCase
+
+
+class TestFilters(BaseTestCase):
+    """
+    Test filter language
+    """
+
+    def test_filter_values_are_bound(self):
+        """Ensure filter values are sent as bound parameters"""
+        criterion = parse_filter(User, "username = 'x'' or 1=1 --'")[0]
+        self.assertNotIn('1=1', str(criterion))
+        self.assertEqual("x' or 1=1 --", criterion.compile().params['username_1'])
+
+    def test_filter_values_are_coerced(self):
+        """Ensure filter values are converted to the column type"""
+        criterion = parse_filter(User, "created_at > '2020-01-01T10:00:00' and active = true")[0]
+        params = criterion.compile().params
+        self.assertEqual(datetime(2020, 1, 1, 10), params['created_at_1'])
+        self.assertRaises(FilterError, parse_filter, User, "id = 'blah'")
+        self.assertRaises(FilterError, parse_filter, User, "active = 1")
+        self.assertRaises(FilterError, parse_filter, User, "id like '1%'")
+
+    def test_filter_shape_is_cached(self):
+        """Ensure filters that only differ in their values share the compiled shape and SQL"""
+        compile_filter.cache_clear()
+        first = parse_filter(User, 'id < 3 or name in (\'a\', \'b\')')[0]
+        second = parse_filter(User, 'id<10 OR name IN (\'c\',\'d\')')[0]
+        self.assertEqual(1, compile_filter.cache_info().hits)
+        self.assertEqual(str(first), str(second))
+
+    def test_filter_invalid(self):
+        """Ensure invalid filters are rejected"""
+        for text in ['id <', 'id = 1)', '(id = 1', 'blah = 1', 'id = 1 and', 'id is 1', 'id ; drop']:
+            self.assertRaises(FilterError, parse_filter, User, text)
+        self.assertEqual([], parse_filter(User, ' '))
+
+    def test_order_by(self):
+        """Ensure order_by only accepts sortable fields"""
+        self.assertEqual(2, len(parse_order_by(User, 'created_at asc, id desc')))
+        self.assertEqual((), parse_order_by(User, ''))
+        self.assertRaises(FilterError, parse_order_by, User, 'password')
+        self.assertRaises(FilterError, parse_order_by, User, "id = 1")
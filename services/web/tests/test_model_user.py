@@ -2,7 +2,7 @@ from sqlalchemy.exc import IntegrityError
 from mimesis import Person
 
 from project import db
-from project.models.user import User
+from project.models.user import User, UserRole
 from tests.base import BaseTestCase
 from tests.utils import add_user
 
@@ -66,4 +66,18 @@ class TestUserModel(BaseTestCase):
         user = add_user()
         auth_token = user.encode_auth_token()
         self.assertTrue(isinstance(auth_token, bytes))
-        self.assertTrue(User.decode_auth_token(auth_token), user.id)
\ No newline at end of file
+        self.assertTrue(User.decode_auth_token(auth_token), user.id)
+
+    def test_model_user_json(self):
+        """Ensure the compiled serializer returns the fields of loaded and expired users"""
+        user = add_user(role=UserRole.ADMIN)
+        data = user.json()
+        self.assertEqual(list(User.__json__), list(data))
+        self.assertEqual(user.id, data['id'])
+        self.assertEqual(user.email, data['email'])
+        self.assertEqual('ADMIN', data['role_name'])
+        self.assertEqual({'id': user.id, 'role_name': 'ADMIN'}, user.json_fields(['id', 'role_name']))
+
+        db.session.expire(user)
+        self.assertEqual(data, User.serializer()(user))
+        self.assertIs(User.serializer(), User.serializer(None, 'json'))
@@ -0,0 +1,55 @@
+import json
+import sqlite3
+from sqlalchemy import exc
+
+from project.api.common.utils.constants import Constants
+from project.api.common.utils.pool import MeteredQueuePool
+from project.models.user import UserRole
+from tests.base import BaseTestCase
+from tests.utils import add_user_password
+
+
+class TestPoolMetrics(BaseTestCase):
+    """
+    Test connection pool metrics
+    """
+    version = 'v1'
+
+    def test_pool_metrics(self):
+        """Ensure the pool counts checkouts, connections in use and timeouts"""
+        pool = MeteredQueuePool(lambda: sqlite3.connect(':memory:'), pool_size=1, max_overflow=0, timeout=0.01)
+        connection = pool.connect()
+        self.assertRaises(exc.TimeoutError, pool.connect)
+        stats = pool.stats()
+        self.assertEqual(1, stats['checked_out'])
+        self.assertEqual(1, stats['checkouts'])
+        self.assertEqual(1, stats['timeouts'])
+        self.assertIsNotNone(stats['wait_time_avg'])
+        connection.close()
+        stats = pool.stats()
+        self.assertEqual(0, stats['checked_out'])
+        self.assertEqual(1, stats['idle'])
+
+    def test_pool_metrics_get(self):
+        """Ensure pool metrics endpoint reports the pool of every engine"""
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.get(f'/{self.version}/metrics/pool',
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual({'primary', 'replica_0'}, set(data['pools']))
+            self.assertEqual('MeteredQueuePool', data['pools']['primary']['pool'])
+            self.assertGreater(data['pools']['primary']['checkouts'], 0)
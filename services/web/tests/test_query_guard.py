@@ -0,0 +1,79 @@
+import json
+from flask import current_app
+from sqlalchemy import exc
+
+from project import db
+from project.api.common import error_handlers
+from project.api.common.utils.constants import Constants
+from project.api.common.utils.helpers import is_statement_timeout
+from project.models.user import UserRole
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_user_password
+
+
+class TestQueryGuard(BaseTestCase):
+    """
+    Test statement timeouts and query cost limit
+    """
+    version = 'v1'
+    url = f'/{version}/users/'
+
+    def tearDown(self):
+        current_app.config['STATEMENT_TIMEOUT'] = 5000
+        current_app.config['QUERY_COST_LIMIT'] = None
+        super().tearDown()
+
+    def test_statement_timeout(self):
+        """Ensure statements running past the statement timeout are cancelled and reported as a timeout"""
+        current_app.config['STATEMENT_TIMEOUT'] = 10
+        db.session.remove()
+        with self.assertRaises(exc.OperationalError) as context:
+            db.session.execute('SELECT pg_sleep(1)')
+        db.session.rollback()
+        self.assertTrue(is_statement_timeout(context.exception))
+        response = error_handlers.handle_general_exception(context.exception)
+        self.assertEqual(504, response.status_code)
+        self.assertEqual('Statement Timeout', response.json['name'])
+
+    def test_statement_timeout_is_local(self):
+        """Ensure the statement timeout ends with the transaction it was set in"""
+        current_app.config['STATEMENT_TIMEOUT'] = 1234
+        db.session.remove()
+        self.assertEqual('1234ms', db.session.execute('SHOW statement_timeout').scalar())
+        db.session.commit()
+        connection = db.engine.connect()
+        self.assertNotEqual('1234ms', connection.execute('SHOW statement_timeout').scalar())
+        connection.close()
+
+    def test_users_get_all_cost_limit(self):
+        """Ensure filtered list queries above the cost limit are rejected before they run"""
+        add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        current_app.config['QUERY_COST_LIMIT'] = 0.001
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+
+            params = dict(filter="(name like '%a%')")
+            response = self.client.get(f'{self.url}', query_string=params,
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('too expensive', data['message'])
+
+            # unfiltered listings are not checked
+            response = self.client.get(f'{self.url}',
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 200)
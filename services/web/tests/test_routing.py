@@ -0,0 +1,72 @@
+import json
+import time
+
+from project import app, db, replica_router
+from project.api.common.utils.constants import Constants
+from project.models.user import User, UserRole
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_user_password
+
+
+class TestReplicaRouting(BaseTestCase):
+    """
+    Test routing of reads to replicas, the test database poses as replica_0
+    """
+    version = 'v1'
+    url = f'/{version}/users/'
+
+    def tearDown(self):
+        replica_router.lags.clear()
+        replica_router.recent_writers.clear()
+        super().tearDown()
+
+    def test_replica_lag(self):
+        """Ensure a primary posing as replica has no lag"""
+        self.assertEqual(0, replica_router.get_lag('replica_0'))
+
+    def test_read_only_requests_read_from_replica(self):
+        """Ensure reads of GET requests go to the replica and reads of other requests to the primary"""
+        with app.test_request_context(method='GET'):
+            self.assertEqual('replica_0', replica_router.get_read_bind())
+            self.assertIsNot(db.engine, db.session.get_bind(User.__mapper__, User.query.statement))
+        with app.test_request_context(method='POST'):
+            self.assertIsNone(replica_router.get_read_bind())
+            self.assertIs(db.engine, db.session.get_bind(User.__mapper__, User.query.statement))
+
+    def test_lagging_replica_is_skipped(self):
+        """Ensure replicas lagging more than REPLICA_MAX_LAG are not read from"""
+        replica_router.lags['replica_0'] = (time.monotonic(), app.config['REPLICA_MAX_LAG'] + 1)
+        with app.test_request_context(method='GET'):
+            self.assertIsNone(replica_router.get_read_bind())
+
+    def test_read_your_writes(self):
+        """Ensure a client reads from the primary after its own write"""
+        user = add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            headers = [('Accept', 'application/json'),
+                       (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+
+            with app.test_request_context(method='GET', headers=headers):
+                self.assertEqual('replica_0', replica_router.get_read_bind())
+
+            response = self.client.put(f'{self.url}{user.id}', data=json.dumps(dict(name='Written Name')),
+                                       content_type='application/json', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('read_primary_until', response.headers.get('Set-Cookie'))
+
+            with app.test_request_context(method='GET', headers=headers):
+                self.assertIsNone(replica_router.get_read_bind())
+            response = self.client.get(f'{self.url}{user.id}', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual('Written Name', data['name'])
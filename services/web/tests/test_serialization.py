@@ -0,0 +1,113 @@
+import json
+from datetime import datetime
+
+import cbor2
+import msgpack
+
+from project.api.common.utils.serialization import JSON_BACKENDS, jsonify
+from project.api.common.utils.constants import Constants
+from project.models.user import UserRole
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_user_password
+
+
+class TestSerialization(BaseTestCase):
+    """
+    Test JSON serialization backends and binary media types
+    """
+    version = 'v1'
+
+    def test_backends_same_output(self):
+        """Ensure every backend serializes dates, enums and iterables to the same bytes"""
+        user = add_user(role=UserRole.ADMIN, created_at=datetime(2020, 1, 2, 3, 4, 5, 6))
+        data = {'users': [user.json()], 'role': UserRole.ADMIN, 'ids': {1}, 'date': datetime(2020, 1, 2).date()}
+        outputs = {name: backend().dumps(data) for name, backend in JSON_BACKENDS.items()}
+        self.assertEqual(1, len(set(outputs.values())), outputs)
+        parsed = json.loads(outputs['orjson'])
+        self.assertEqual('2020-01-02T03:04:05.000006', parsed['users'][0]['created_at'])
+        self.assertEqual('2020-01-02', parsed['date'])
+        self.assertEqual(2, parsed['role'])
+        self.assertEqual([1], parsed['ids'])
+
+    def test_backends_non_str_keys(self):
+        """Ensure every backend converts non string keys to strings before sorting them"""
+        data = {'a': [{10: 'ten', 2: 'two'}], 2: None, True: 1, datetime(2020, 1, 2).date(): 'day'}
+        outputs = {name: backend().dumps(data) for name, backend in JSON_BACKENDS.items()}
+        self.assertEqual(1, len(set(outputs.values())), outputs)
+        self.assertEqual(b'{"2":null,"2020-01-02":"day","a":[{"10":"ten","2":"two"}],"true":1}', outputs['json'])
+
+    def test_jsonify(self):
+        """Ensure jsonify builds a JSON response like flask.jsonify"""
+        response = jsonify(message='hello', count=1)
+        self.assertEqual('application/json', response.mimetype)
+        self.assertEqual({'message': 'hello', 'count': 1}, json.loads(response.data.decode()))
+        self.assertEqual([1, 2], json.loads(jsonify(1, 2).data.decode()))
+
+    def test_msgpack(self):
+        """Ensure request bodies and responses can be sent in MessagePack"""
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=msgpack.packb(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/msgpack',
+                headers=[('Accept', 'application/msgpack')]
+            )
+            self.assertEqual(resp_login.status_code, 200)
+            self.assertEqual('application/msgpack', resp_login.mimetype)
+            self.assertIn('Accept', resp_login.headers['Vary'])
+            auth_token = msgpack.unpackb(resp_login.data)['auth_token']
+
+            response = self.client.get(f'/{self.version}/users/',
+                                       headers=[('Accept', 'application/msgpack'),
+                                                (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 200)
+            data = msgpack.unpackb(response.data)
+            self.assertEqual(admin.email, data['users'][0]['email'])
+            self.assertEqual(admin.created_at.isoformat(), data['users'][0]['created_at'])
+
+            """ Tests the JSON representation has another ETag"""
+            response_json = self.client.get(f'/{self.version}/users/',
+                                            headers=[('Accept', 'application/json'),
+                                                     (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+            self.assertEqual(data, json.loads(response_json.data.decode()))
+            self.assertNotEqual(response.headers['ETag'], response_json.headers['ETag'])
+
+            """ Tests malformed body"""
+            response = self.client.post(f'/{self.version}/auth/login', data=b'\xc1',
+                                        content_type='application/msgpack',
+                                        headers=[('Accept', 'application/msgpack')])
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual('application/msgpack', response.mimetype)
+
+    def test_cbor(self):
+        """Ensure responses can be sent in CBOR and unsupported media types are not acceptable"""
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=cbor2.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/cbor',
+                headers=[('Accept', 'application/cbor')]
+            )
+            self.assertEqual(resp_login.status_code, 200)
+            self.assertEqual('application/cbor', resp_login.mimetype)
+            auth_token = cbor2.loads(resp_login.data)['auth_token']
+
+            response = self.client.get(f'/{self.version}/users/',
+                                       headers=[('Accept', 'application/cbor'),
+                                                (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 200)
+            data = cbor2.loads(response.data)
+            self.assertEqual(admin.created_at, data['users'][0]['created_at'].replace(tzinfo=None))
+
+            response = self.client.get(f'/{self.version}/users/',
+                                       headers=[('Accept', 'application/xml'),
+                                                (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 406)
@@ -0,0 +1,124 @@
+import json
+from datetime import date, datetime, timedelta
+
+from project import db
+from project.api.common.utils.constants import Constants
+from project.models.user import User, UserRole, SocialAuth
+from project.models.user_stats import UserStat, UserSignupDay
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_user_password
+
+
+class TestUserStats(BaseTestCase):
+    """
+    Test user rollups and the stats endpoint
+    """
+    version = 'v1'
+    url = f'/{version}/stats/users'
+
+    def test_user_stats_maintained_on_write(self):
+        """Ensure the rollups follow user inserts, updates and deletes"""
+        user = add_user()
+        add_user(role=UserRole.ADMIN, created_at=datetime.now() - timedelta(days=1))
+        dimensions = UserStat.dimensions()
+        self.assertEqual([{'role': 1, 'role_name': 'USER', 'count': 1}, {'role': 2, 'role_name': 'ADMIN', 'count': 1}],
+                         dimensions['role'])
+        self.assertEqual([{'active': True, 'count': 2}], dimensions['active'])
+        self.assertEqual([{'social_type': None, 'count': 2}], dimensions['social_type'])
+        self.assertEqual([date.today() - timedelta(days=1), date.today()],
+                         [signup.day for signup in UserSignupDay.last_days(2)])
+
+        user.active = False
+        user.social_type = SocialAuth.GITHUB.value
+        db.session.commit()
+        dimensions = UserStat.dimensions()
+        self.assertEqual([{'active': False, 'count': 1}, {'active': True, 'count': 1}], dimensions['active'])
+        self.assertEqual([{'social_type': None, 'count': 1}, {'social_type': 'GitHub', 'count': 1}],
+                         dimensions['social_type'])
+
+        db.session.delete(user)
+        db.session.commit()
+        dimensions = UserStat.dimensions()
+        self.assertEqual([{'role': 2, 'role_name': 'ADMIN', 'count': 1}], dimensions['role'])
+        self.assertEqual([{'active': True, 'count': 1}], dimensions['active'])
+        self.assertEqual([date.today() - timedelta(days=1)], [signup.day for signup in UserSignupDay.last_days(2)])
+
+    def test_user_stats_maintained_on_bulk_write(self):
+        """Ensure the rollups follow statements writing several users at once"""
+        users = User.__table__
+        db.session.execute(users.insert(), [
+            dict(email=f'bulk{i}@example.com', username=f'bulk{i}', name=f'Bulk {i}', created_at=datetime.now())
+            for i in range(3)
+        ])
+        db.session.execute(users.update().where(users.c.username == 'bulk0').values(active=False))
+        # no aggregated column changes, the counts stay the same
+        db.session.execute(users.update().values(name='Renamed'))
+        db.session.commit()
+        dimensions = UserStat.dimensions()
+        self.assertEqual([{'role': 1, 'role_name': 'USER', 'count': 3}], dimensions['role'])
+        self.assertEqual([{'active': False, 'count': 1}, {'active': True, 'count': 2}], dimensions['active'])
+        self.assertEqual([{'day': date.today().isoformat(), 'count': 3}],
+                         [signup.json() for signup in UserSignupDay.last_days(1)])
+
+        db.session.execute(users.delete().where(users.c.active))
+        db.session.commit()
+        dimensions = UserStat.dimensions()
+        self.assertEqual([{'role': 1, 'role_name': 'USER', 'count': 1}], dimensions['role'])
+        self.assertEqual([{'active': False, 'count': 1}], dimensions['active'])
+        self.assertEqual([{'day': date.today().isoformat(), 'count': 1}],
+                         [signup.json() for signup in UserSignupDay.last_days(1)])
+
+    def test_user_stats_rebuild(self):
+        """Ensure rebuilding the rollups gives the same counts as maintaining them"""
+        add_user()
+        add_user(role=UserRole.ADMIN)
+        expected = UserStat.dimensions()
+        db.session.execute('DELETE FROM user_stat')
+        UserStat.rebuild()
+        db.session.commit()
+        self.assertEqual(expected, UserStat.dimensions())
+
+    def test_user_stats_get(self):
+        """Ensure stats endpoint returns the user counts"""
+        add_user()
+        admin, password = add_user_password(role=UserRole.ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=admin.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.get(f'{self.url}', query_string=dict(days=7),
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(2, data['total'])
+            self.assertEqual([{'active': True, 'count': 2}], data['active'])
+            self.assertEqual([{'day': date.today().isoformat(), 'count': 2}], data['signups'])
+
+    def test_user_stats_get_not_admin(self):
+        """Ensure stats endpoint is forbidden to non admin users"""
+        user, password = add_user_password()
+        with self.client:
+            resp_login = self.client.post(
+                f'/{self.version}/auth/login',
+                data=json.dumps(dict(
+                    email=user.email,
+                    password=password
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            auth_token = json.loads(resp_login.data.decode())['auth_token']
+            response = self.client.get(f'{self.url}',
+                                       headers=[('Accept', 'application/json'),
+                                                (Constants.HttpHeaders.AUTHORIZATION,
+                                                 'Bearer ' + auth_token)])
+            self.assertEqual(response.status_code, 403)